@@ -2,11 +2,17 @@ import cv2
 import numpy as np
 import os
 import json
+from color_segmentation import COLOR_RANGES, segment_colors, color_mask, color_coverage
+from extraction import preview_levels, pyramid_down, scaled_ksize, apply_morph, extract_components
 
 # --- CONFIG ---
 OUTPUT_FOLDER = "objects3"
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 CONFIG_FILE = "threshold_config.json"
+# Măștile pentru previzualizare se calculează pe o copie micșorată (pyrDown) cu
+# latura maximă PREVIEW_MAX_SIDE; rezoluția nativă se folosește doar la salvare.
+PREVIEW_MAX_SIDE = 1200
+MORPH_KSIZE = 5
 
 # Initial HSV config (will load from file if exists)
 hsv_config = {
@@ -16,73 +22,52 @@ hsv_config = {
 if os.path.exists(CONFIG_FILE):
     hsv_config = json.load(open(CONFIG_FILE))
 
-COLOR_RANGES = {
-    "red": [((0, 100, 100), (10, 255, 255)), ((160, 100, 100), (179, 255, 255))],
-    "green": [((40, 50, 50), (85, 255, 255))],
-    "yellow": [((20, 100, 100), (35, 255, 255))],
-    "pink": [((145, 100, 100), (165, 255, 255))],
-    "light_blue": [((85, 100, 100), (105, 255, 255))],
-    "orange": [((10, 100, 100), (20, 255, 255))],
-    "blue": [((105, 100, 100), (130, 255, 255))]
-}
-
-def generate_masks(img):
-    hsv_img = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-    masks = {}
-    for color, ranges in COLOR_RANGES.items():
-        mask = np.zeros(img.shape[:2], dtype=np.uint8)
-        for (low, high) in ranges:
-            mask |= cv2.inRange(hsv_img, np.array(low), np.array(high))
-        masks[color] = mask
-    return masks
-
-def auto_select_top_colors(masks):
-    coverage = {name: cv2.countNonZero(mask) for name, mask in masks.items()}
+def auto_select_top_colors(coverage):
     sorted_colors = sorted(coverage, key=coverage.get, reverse=True)
     top_colors = [c for c in sorted_colors if coverage[c] > 0][:2]
     print(f"[Auto-selected] {top_colors}")
     return top_colors if top_colors else ["HSV_Calibrate"]
 
-def apply_morph(mask):
-    kernel = np.ones((5, 5), np.uint8)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-    return mask
-
 def classify_and_save(img, mask, color_name, idx):
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    for i, cnt in enumerate(contours):
-        if cv2.contourArea(cnt) < 300:
-            continue
-        x, y, w, h = cv2.boundingRect(cnt)
-        obj = img[y:y+h, x:x+w]
-        alpha = mask[y:y+h, x:x+w]
-        b, g, r = cv2.split(obj)
-        rgba = cv2.merge((b, g, r, alpha))
+    components = extract_components(mask, min_area=300)
+    for i, obj in enumerate(components.objects):
+        rgba = components.rgba(img, obj)
         out_name = f"{color_name}_{idx}_{i}.png"
         cv2.imwrite(os.path.join(OUTPUT_FOLDER, out_name), rgba)
         print(f"[Saved] {out_name}")
 
+def hsv_mask(hsv_img, ksize=MORPH_KSIZE):
+    lower = np.array([hsv_config["lh"], hsv_config["ls"], hsv_config["lv"]])
+    upper = np.array([hsv_config["uh"], hsv_config["us"], hsv_config["uv"]])
+    return apply_morph(cv2.inRange(hsv_img, lower, upper), ksize)
+
 def hsv_calibrate(img):
     cv2.namedWindow("HSV Calibrate")
     for k, max_val in [("lh", 179), ("ls", 255), ("lv", 255), ("uh", 179), ("us", 255), ("uv", 255)]:
         cv2.createTrackbar(k, "HSV Calibrate", hsv_config[k], max_val, lambda x: None)
-    
+
+    # Previzualizare pe copia micșorată: HSV o singură dată, masca doar când se mișcă un slider
+    levels = preview_levels(img.shape, PREVIEW_MAX_SIDE)
+    small = pyramid_down(img, levels)
+    small_hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    small_ksize = scaled_ksize(MORPH_KSIZE, levels)
+    last_values, combined = None, None
+
     while True:
         for k in hsv_config:
             hsv_config[k] = cv2.getTrackbarPos(k, "HSV Calibrate")
-        hsv_img = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        lower = np.array([hsv_config["lh"], hsv_config["ls"], hsv_config["lv"]])
-        upper = np.array([hsv_config["uh"], hsv_config["us"], hsv_config["uv"]])
-        mask = cv2.inRange(hsv_img, lower, upper)
-        mask = apply_morph(mask)
-        mask_vis = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
-        combined = cv2.hconcat([img, mask_vis])
-        combined = resize_to_fit(combined, 1200)
+        values = tuple(hsv_config.values())
+        if values != last_values:
+            mask = hsv_mask(small_hsv, small_ksize)
+            mask_vis = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
+            combined = resize_to_fit(cv2.hconcat([small, mask_vis]), 1200)
+            last_values = values
         cv2.imshow("HSV Calibrate", combined)
         key = cv2.waitKey(30) & 0xFF
         if key == ord('s'):
-            classify_and_save(img, mask, "HSV_Calibrate", 0)
+            # rezoluție nativă doar pentru salvare
+            full_mask = hsv_mask(cv2.cvtColor(img, cv2.COLOR_BGR2HSV))
+            classify_and_save(img, full_mask, "HSV_Calibrate", 0)
             break
         elif key == ord('q'):
             json.dump(hsv_config, open(CONFIG_FILE, "w"), indent=2)
@@ -102,10 +87,16 @@ def interactive_selection(image_paths):
         if img is None:
             print(f"⚠️ Could not load {path}")
             continue
-        masks = generate_masks(img)
-        top_colors = auto_select_top_colors(masks)
-        all_options = top_colors + [c for c in masks if c not in top_colors] + ["HSV_Calibrate"]
+        # o singură trecere LUT pe copia micșorată -> etichete pentru previzualizare și acoperire;
+        # imaginea la rezoluție nativă se segmentează doar la salvare
+        levels = preview_levels(img.shape, PREVIEW_MAX_SIDE)
+        small = pyramid_down(img, levels)
+        small_ksize = scaled_ksize(MORPH_KSIZE, levels)
+        labels = segment_colors(small)
+        top_colors = auto_select_top_colors(color_coverage(labels))
+        all_options = top_colors + [c for c in COLOR_RANGES if c not in top_colors] + ["HSV_Calibrate"]
         selected_idx = 0
+        preview_masks = {}
 
         while True:
             sel = all_options[selected_idx]
@@ -113,9 +104,10 @@ def interactive_selection(image_paths):
                 hsv_calibrate(img)
                 break
             else:
-                mask = apply_morph(masks[sel])
-                mask_vis = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
-                combined = cv2.hconcat([img, mask_vis])
+                if sel not in preview_masks:
+                    preview_masks[sel] = apply_morph(color_mask(labels, sel), small_ksize)
+                mask_vis = cv2.cvtColor(preview_masks[sel], cv2.COLOR_GRAY2BGR)
+                combined = cv2.hconcat([small, mask_vis])
                 combined = resize_to_fit(combined, 1200)
                 menu = np.ones((40, combined.shape[1], 3), dtype=np.uint8) * 50
                 x = 10
@@ -140,6 +132,7 @@ def interactive_selection(image_paths):
                     cv2.destroyAllWindows()
                     return
                 elif key == ord('s'):
+                    mask = apply_morph(color_mask(segment_colors(img), sel))
                     classify_and_save(img, mask, sel, idx)
                     break
     cv2.destroyAllWindows()
@@ -1,16 +1,29 @@
 import os
 import random
-import shutil
+import argparse
+import json
 import yaml
 import cv2
 import time
+import traceback
 import numpy as np
 import multiprocessing as mp
-from functools import partial
 from tqdm import tqdm
-from compose_images import add_shadow_smooth_pro, overlay_image
+from compose_images import add_shadow_smooth_pro, overlay_image, ArrayCache
+from asset_bank import AssetBank
+from placement import PlacementGrid
+from label_index import read_label_txt, write_label_index
 
 NUM_THREADS = 8
+CHUNK_SIZE = 16  # joburi trimise odată unui worker prin imap_unordered
+# Unghiurile de rotație se cuantizează la pași de ANGLE_STEP grade, astfel încât
+# umbra (și rotația) aceluiași obiect să poată fi refolosite din cache.
+ANGLE_STEP = 2
+SHADOW_BLUR_MODE = "gauss"  # "gauss", "separable" sau "downscale"
+# Plasare: distanța minimă (px) între obiecte și testul de suprapunere la
+# nivel de mască (obiectele pot avea bbox-uri care se ating, dar nu pixeli comuni)
+MIN_SPACING = 0
+MASK_OVERLAP = False
 CLASSES = {
     "triangle": 0,
     "rectangle": 1,
@@ -24,22 +37,75 @@ bck_path = os.path.join(BASE_DIR, "backgrounds")
 objects_path = os.path.join(BASE_DIR, "polished_objects")
 
 
+# Starea workerului curent (setată o singură dată de _init_worker):
+# banca de asset-uri și argumentele comune tuturor joburilor
+_ASSETS = None
+_JOB_CONFIG = None
+
+
+def _init_worker(assets, job_config=None):
+    global _ASSETS, _JOB_CONFIG
+    _ASSETS = assets
+    _JOB_CONFIG = job_config
+
+
+def load_background(path, size=(640, 550)):
+    bg = _ASSETS.background(path) if _ASSETS is not None else None
+    if bg is not None:
+        return bg.copy()  # fundalul e desenat in-place, banca rămâne neatinsă
+    return cv2.resize(cv2.imread(path), size)
+
+
+def load_object(object_folder, name):
+    fg = _ASSETS.object(name) if _ASSETS is not None else None
+    if fg is not None:
+        return fg
+    return cv2.imread(os.path.join(object_folder, name), cv2.IMREAD_UNCHANGED)
+
+
+TMP_SUFFIX = ".tmp"
+
+
 def safe_imwrite(path, img, retries=3, delay=0.2):
+    # Scriem într-un fișier temporar și îl redenumim, ca o imagine pe jumătate
+    # scrisă (proces oprit) să nu apară niciodată sub numele final. Temporarul
+    # e "<nume>.jpg.tmp": YOLO nu-l ia drept imagine dacă rămâne după o oprire.
+    ok, buffer = cv2.imencode(os.path.splitext(path)[1], img)
+    if not ok:
+        print(f"[ERROR] Could not encode image: {path}")
+        return False
+    tmp_path = path + TMP_SUFFIX
     for _ in range(retries):
-        if cv2.imwrite(path, img):
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(buffer)
+            os.replace(tmp_path, path)
             return True
-        time.sleep(delay)
+        except OSError:
+            time.sleep(delay)
     print(f"[ERROR] Could not write image: {path}")
     return False
 
 
-def boxes_overlap(box1, box2):
-    x1_min, y1_min, x1_max, y1_max = box1
-    x2_min, y2_min, x2_max, y2_max = box2
-    return not (x1_max <= x2_min or x1_min >= x2_max or y1_max <= y2_min or y1_min >= y2_max)
+def remove_stray_tmp(output_folder):
+    """Șterge temporarele rămase de la o rulare oprită (inclusiv vechile *.tmp.jpg)."""
+    removed = 0
+    for split in ("train", "val"):
+        for sub in ("images", "labels"):
+            folder = os.path.join(output_folder, split, sub)
+            for name in os.listdir(folder):
+                if name.endswith(TMP_SUFFIX) or ".tmp." in name:
+                    os.remove(os.path.join(folder, name))
+                    removed += 1
+    return removed
 
 
 def rotate_image(img, angle):
+    """Rotește img (BGRA) cu fundal transparent.
+
+    Returnează (rotated, bbox), unde bbox = (x0, y0, x1, y1) inclusiv este
+    dreptunghiul strâns al pixelilor cu alpha > 0, sau None dacă nu există.
+    """
     h0, w0 = img.shape[:2]
     center = (w0 / 2, h0 / 2)
     M = cv2.getRotationMatrix2D(center, angle, 1.0)
@@ -52,76 +118,92 @@ def rotate_image(img, angle):
     M[0, 2] += (new_w / 2) - center[0]
     M[1, 2] += (new_h / 2) - center[1]
     # rotate with transparent background
-    return cv2.warpAffine(
+    rotated = cv2.warpAffine(
         img, M, (new_w, new_h), flags=cv2.INTER_LINEAR,
         borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0, 0)
     )
+    # tight bbox din reduceri pe rânduri/coloane (doar vectori 1D, nu coordonate per pixel)
+    alpha = rotated[:, :, 3]
+    cols = np.flatnonzero(alpha.max(axis=0))
+    if cols.size == 0:
+        return rotated, None
+    rows = np.flatnonzero(alpha.max(axis=1))
+    return rotated, (int(cols[0]), int(rows[0]), int(cols[-1]), int(rows[-1]))
+
+
+# Sprite-uri rotite per (fișier obiect, unghi cuantizat), per proces
+ROTATION_CACHE = ArrayCache()
+
+
+def rotated_sprite(fg_name, fg, angle):
+    """rotate_image(fg, angle) calculat o singură dată per (obiect, unghi)."""
+    return ROTATION_CACHE.get((fg_name, angle), lambda: rotate_image(fg, angle))
+
+
+def job_rng(seed, idx):
+    """RNG propriu fiecărui job, derivat din seed-ul master și indexul jobului.
+
+    Rezultatul unui job nu depinde de worker sau de ordinea de execuție.
+    """
+    return random.Random(f"{seed}-{idx}")
 
 
 def make_synth(idx, bg_files, obj_files_by_class, shadow_prob,
                object_folder, out_img, out_lbl,
-               min_objs=2, max_objs=4, max_angle=30):
-    bg = cv2.resize(cv2.imread(random.choice(bg_files)), (640, 550))
+               min_objs=2, max_objs=4, max_angle=30, rng=random,
+               min_spacing=0, mask_overlap=False):
+    bg = load_background(rng.choice(bg_files))
     labels = []
-    placed_boxes = []
+    boxes = []  # aceleași etichete, numeric, pentru indexul columnar
+    grid = PlacementGrid(640, 550, min_spacing=min_spacing)
 
     available_classes = [cls for cls in CLASSES if obj_files_by_class[cls]]
     if not available_classes:
-        print(f"[ERROR] No objects available for any class, skipping idx {idx}")
-        return
+        # problemă de configurare, nu un rezultat: jobul e jurnalizat "error" și reluat la --resume
+        raise ValueError(f"No objects available for any class (idx {idx})")
 
-    num_objs = random.randint(min_objs, max_objs)
-    classes_for_image = random.choices(available_classes, k=num_objs)
+    num_objs = rng.randint(min_objs, max_objs)
+    classes_for_image = rng.choices(available_classes, k=num_objs)
 
     for cls_name in classes_for_image:
         fg_list = obj_files_by_class[cls_name]
         if not fg_list:
             print(f"[WARN] No objects for class {cls_name}, skipping object")
             continue
-        fg_name = random.choice(fg_list)
-        fg_path = os.path.join(object_folder, fg_name)
-        fg = cv2.imread(fg_path, cv2.IMREAD_UNCHANGED)
+        fg_name = rng.choice(fg_list)
+        fg = load_object(object_folder, fg_name)
         if fg is None or fg.shape[2] != 4:
             print(f"[WARN] Invalid object (missing alpha): {fg_name}")
             continue
 
         # Apply random rotation
-        angle = random.uniform(-max_angle, max_angle)
-        fg_rot = rotate_image(fg, angle)
-        h, w = fg_rot.shape[:2]
-
-        # find non-zero alpha mask box in rotated image
-        mask = fg_rot[:, :, 3] > 0
-        ys, xs = np.where(mask)
-        if ys.size == 0 or xs.size == 0:
+        angle = round(rng.uniform(-max_angle, max_angle) / ANGLE_STEP) * ANGLE_STEP
+        fg_rot, tight = rotated_sprite(fg_name, fg, angle)
+        if tight is None:
             continue
-        y0, y1 = ys.min(), ys.max()
-        x0, x1 = xs.min(), xs.max()
+        x0, y0, x1, y1 = tight
         obj_h = y1 - y0 + 1
         obj_w = x1 - x0 + 1
 
-        placed = False
-        for _ in range(50):
-            x = random.randint(0, 640 - w)
-            y = random.randint(0, 550 - h)
-            # compute bbox for mask region
-            box = (x + x0, y + y0, x + x1, y + y1)
-            if all(not boxes_overlap(box, b) for b in placed_boxes):
-                placed_boxes.append(box)
-                placed = True
-                break
-
-        if not placed:
+        # sample only among free positions for the tight bbox
+        tight_mask = fg_rot[y0:y1 + 1, x0:x1 + 1, 3] if mask_overlap else None
+        pos = grid.place(obj_w, obj_h, rng, mask=tight_mask)
+        if pos is None:
             print(f"[WARN] Could not place {cls_name} without overlap in idx {idx}")
             continue
+        bx, by = pos
+        x, y = bx - x0, by - y0  # sprite-ul poate ieși parțial din canvas, doar bbox-ul nu
+        box = (bx, by, bx + obj_w - 1, by + obj_h - 1)
 
         # overlay shadow
-        if random.random() < shadow_prob:
+        if rng.random() < shadow_prob:
             bg = add_shadow_smooth_pro(fg_rot, bg, x, y,
                                        direction=(15, 15), blur_gauss=121,
                                        use_bilateral=True,
                                        bilateral_params=(15, 100, 100),
-                                       opacity=0.35)
+                                       opacity=0.35,
+                                       blur_mode=SHADOW_BLUR_MODE,
+                                       cache_key=(fg_name, angle))
         
         # overlay rotated object
         bg = overlay_image(bg, fg_rot, x, y)
@@ -133,26 +215,129 @@ def make_synth(idx, bg_files, obj_files_by_class, shadow_prob,
         nw = (bx_max - bx_min) / 640
         nh = (by_max - by_min) / 550
         labels.append(f"{CLASSES[cls_name]} {cx:.6f} {cy:.6f} {nw:.6f} {nh:.6f}")
+        boxes.append((CLASSES[cls_name], cx, cy, nw, nh))
 
     if labels:
-        img_path = os.path.join(out_img, f"synth_{idx:04d}.jpg")
-        lbl_path = os.path.join(out_lbl, f"synth_{idx:04d}.txt")
-        safe_imwrite(img_path, bg)
-        with open(lbl_path, 'w') as f:
+        img_name = f"synth_{idx:04d}.jpg"
+        lbl_name = f"synth_{idx:04d}.txt"
+        if not safe_imwrite(os.path.join(out_img, img_name), bg):
+            raise OSError(f"Could not write image: {os.path.join(out_img, img_name)}")
+        lbl_path = os.path.join(out_lbl, lbl_name)
+        with open(lbl_path + TMP_SUFFIX, 'w') as f:
             f.write("\n".join(labels))
+        os.replace(lbl_path + TMP_SUFFIX, lbl_path)
+        return img_name, lbl_name, boxes
+    return None
+
+
+def assign_splits(num_images, split_ratio, seed=0):
+    """Split-ul (train/val) fiecărui job, decis dinainte și determinist din seed."""
+    order = list(range(num_images))
+    random.Random(seed).shuffle(order)
+    n_train = int(num_images * split_ratio)
+    splits = ["val"] * num_images
+    for idx in order[:n_train]:
+        splits[idx] = "train"
+    return splits
+
+
+def write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def manifest_item(idx, split):
+    name = f"synth_{idx:04d}"
+    return {
+        "idx": idx,
+        "split": split,
+        "image": f"{split}/images/{name}.jpg",
+        "label": f"{split}/labels/{name}.txt",
+    }
 
 
-def make_synth_job(idx, *args, **kwargs):
-    make_synth(idx=idx, *args, **kwargs)
-
-def create_dataset(output_folder="dataset", n_per_class=250, split_ratio=0.8):
-    tmp_img = os.path.join(output_folder, "all", "images")
-    tmp_lbl = os.path.join(output_folder, "all", "labels")
-    os.makedirs(tmp_img, exist_ok=True)
-    os.makedirs(tmp_lbl, exist_ok=True)
+def is_valid_output(output_folder, item):
+    """True dacă imaginea și eticheta jobului există și sunt complete."""
+    img_path = os.path.join(output_folder, item["image"])
+    lbl_path = os.path.join(output_folder, item["label"])
+    try:
+        with open(img_path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return False
+            f.seek(-2, os.SEEK_END)
+            if f.read(2) != b"\xff\xd9":
+                return False
+        with open(lbl_path) as f:
+            lines = [line.split() for line in f.read().splitlines() if line.strip()]
+        return bool(lines) and all(len(p) == 5 for p in lines)
+    except (OSError, ValueError):
+        return False
+
+
+def append_journal(journal_path, entry):
+    # O singură linie scurtă per write în mod append -> atomic între procese
+    with open(journal_path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def read_journal(journal_path):
+    header, done = None, {}
+    if not os.path.exists(journal_path):
+        return header, done
+    with open(journal_path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # ultima linie poate fi trunchiată la o oprire bruscă
+            if "run" in entry:
+                header = entry["run"]
+            else:
+                done[entry["idx"]] = entry
+    return header, done
+
+
+def make_synth_job(job, output_folder, seed, journal_path, **kwargs):
+    idx, split = job
+    result = make_synth(
+        idx=idx,
+        out_img=os.path.join(output_folder, split, "images"),
+        out_lbl=os.path.join(output_folder, split, "labels"),
+        rng=job_rng(seed, idx),
+        **kwargs
+    )
+    item = manifest_item(idx, split) if result is not None else None
+    # "empty" = niciun obiect plasat (determinist, nu se reia); erorile le jurnalizează _run_job
+    append_journal(journal_path, {"idx": idx, "split": split,
+                                  "status": "written" if item is not None else "empty"})
+    if item is not None:
+        item["boxes"] = result[2]  # scos de create_dataset înainte de manifest
+    return item
+
+
+def _run_job(job):
+    """Rulează un job în worker; erorile sunt returnate, nu propagate, ca să nu oprească pool-ul."""
+    try:
+        return job[0], make_synth_job(job, **_JOB_CONFIG), None
+    except Exception:
+        # scriere eșuată sau altă eroare: jobul trebuie refăcut la --resume
+        append_journal(_JOB_CONFIG["journal_path"], {"idx": job[0], "split": job[1], "status": "error"})
+        return job[0], None, traceback.format_exc()
+
+
+def create_dataset(output_folder="dataset", n_per_class=250, split_ratio=0.8,
+                   seed=0, resume=False, workers=NUM_THREADS, chunk_size=CHUNK_SIZE):
+    # Workerii scriu direct în train/ sau val/, fără folder intermediar "all/"
+    for subset in ["train", "val"]:
+        for sub in ["images", "labels"]:
+            os.makedirs(os.path.join(output_folder, subset, sub), exist_ok=True)
 
-    bg_files = [os.path.join(bck_path, f) for f in os.listdir(bck_path) if f.lower().endswith(('.jpg', '.png'))]
-    obj_files = [f for f in os.listdir(objects_path) if f.lower().endswith('.png')]
+    bg_files = sorted(os.path.join(bck_path, f) for f in os.listdir(bck_path) if f.lower().endswith(('.jpg', '.png')))
+    obj_files = sorted(f for f in os.listdir(objects_path) if f.lower().endswith('.png'))
 
     obj_files_by_class = {cls: [] for cls in CLASSES}
     for f in obj_files:
@@ -161,39 +346,107 @@ def create_dataset(output_folder="dataset", n_per_class=250, split_ratio=0.8):
                 obj_files_by_class[cls].append(f)
 
     num_images = n_per_class * len(CLASSES)
-    jobs = list(range(num_images))
-    random.shuffle(jobs)
-
-    func = partial(
-        make_synth_job,
+    splits = assign_splits(num_images, split_ratio, seed)
+    jobs = list(enumerate(splits))
+
+    # Jurnal de progres: antet cu parametrii rulării + o linie per job terminat
+    run_params = {"seed": seed, "num_images": num_images, "split_ratio": split_ratio}
+    journal_path = os.path.join(output_folder, "journal.jsonl")
+    done_items = []
+    if resume:
+        header, journal = read_journal(journal_path)
+        if header is not None and header != run_params:
+            raise ValueError(f"Cannot resume: journal was written for {header}, not {run_params}")
+        removed = remove_stray_tmp(output_folder)
+        if removed:
+            print(f"[RESUME] Removed {removed} leftover temp files")
+        pending = []
+        for idx, split in jobs:
+            item = manifest_item(idx, split)
+            entry = journal.get(idx, {})
+            # jurnale vechi: doar "written" true/false; false putea fi și o eroare, deci se reia
+            status = entry.get("status", "written" if entry.get("written") else None)
+            if status == "empty":
+                continue  # job terminat fără obiecte plasate; ar da același rezultat
+            if status == "written" and is_valid_output(output_folder, item):
+                done_items.append(item)
+            else:
+                pending.append((idx, split))  # eroare, neterminat sau fișiere incomplete
+        print(f"[RESUME] {len(jobs) - len(pending)} jobs done, {len(pending)} left")
+        jobs = pending
+        if header is None:
+            append_journal(journal_path, {"run": run_params})
+    else:
+        with open(journal_path, "w") as f:
+            f.write(json.dumps({"run": run_params}) + "\n")
+
+    job_config = dict(
+        output_folder=output_folder,
+        seed=seed,
+        journal_path=journal_path,
         bg_files=bg_files,
         obj_files_by_class=obj_files_by_class,
         shadow_prob=0.7,
         object_folder=objects_path,
-        out_img=tmp_img,
-        out_lbl=tmp_lbl
+        min_spacing=MIN_SPACING,
+        mask_overlap=MASK_OVERLAP
     )
 
-    with mp.Pool(NUM_THREADS) as pool:
-        list(tqdm(pool.map(func, jobs), total=len(jobs)))
-
-    all_imgs = [f for f in os.listdir(tmp_img) if f.endswith(".jpg")]
-    random.shuffle(all_imgs)
-    split = int(len(all_imgs) * split_ratio)
-    train_imgs = all_imgs[:split]
-    val_imgs = all_imgs[split:]
-
-    for subset, files in [("train", train_imgs), ("val", val_imgs)]:
-        for sub in ["images", "labels"]:
-            os.makedirs(os.path.join(output_folder, subset, sub), exist_ok=True)
-        for f in files:
-            shutil.move(os.path.join(tmp_img, f), os.path.join(output_folder, subset, "images", f))
-            lbl = f.replace(".jpg", ".txt")
-            shutil.move(os.path.join(tmp_lbl, lbl), os.path.join(output_folder, subset, "labels", lbl))
-
-    # Cleanup temp folders
-    shutil.rmtree(os.path.join(output_folder, "all"))
-    print(f"✅ Dataset created: {len(train_imgs)} train, {len(val_imgs)} val")
+    # Decodăm o singură dată toate fundalurile și obiectele, apoi le dăm workerilor
+    assets = AssetBank.load(bg_files, obj_files, objects_path)
+    print(f"[ASSETS] {assets.report()}")
+
+    # Joburile sunt doar (idx, split); configul comun ajunge o singură dată per worker
+    new_items, errors, skipped = [], [], 0
+    start = time.perf_counter()
+    with mp.Pool(workers, initializer=_init_worker, initargs=(assets, job_config)) as pool, \
+            tqdm(total=len(jobs), unit="img", smoothing=0.1) as pbar:
+        for idx, item, error in pool.imap_unordered(_run_job, jobs, chunksize=chunk_size):
+            if error is not None:
+                errors.append({"idx": idx, "error": error})
+                print(f"[ERROR] Job {idx} failed:\n{error}")
+            elif item is None:
+                skipped += 1
+            else:
+                new_items.append(item)
+            pbar.update(1)
+            pbar.set_postfix(errors=len(errors), skipped=skipped)
+    elapsed = time.perf_counter() - start
+
+    write_json_atomic(os.path.join(output_folder, "generation_report.json"), {
+        "jobs": len(jobs),
+        "written": len(new_items),
+        "skipped": skipped,
+        "failed": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "images_per_s": round(len(jobs) / elapsed, 2) if elapsed > 0 else None,
+        "workers": workers,
+        "chunk_size": chunk_size,
+        "errors": errors,
+    })
+    if errors:
+        print(f"[WARN] {len(errors)} jobs failed, see generation_report.json (rerun with --resume)")
+
+    items = sorted(done_items + new_items, key=lambda r: r["idx"])
+
+    # Index columnar per split (<split>/labels.npz), din etichetele deja în memorie;
+    # doar joburile reluate cu --resume își recitesc fișierul .txt
+    for subset in ["train", "val"]:
+        labels_dir = os.path.join(output_folder, subset, "labels")
+        split_items = [r for r in items if r["split"] == subset]
+        names = [os.path.splitext(os.path.basename(r["label"]))[0] for r in split_items]
+        boxes = {
+            name: r.pop("boxes") if "boxes" in r else read_label_txt(os.path.join(output_folder, r["label"]))
+            for name, r in zip(names, split_items)
+        }
+        write_label_index(labels_dir, names, boxes)
+    write_json_atomic(os.path.join(output_folder, "manifest.json"), {
+        "seed": seed,
+        "split_ratio": split_ratio,
+        "items": items,
+    })
+    n_train = sum(1 for r in items if r["split"] == "train")
+    print(f"✅ Dataset created: {n_train} train, {len(items) - n_train} val")
 
 def write_data_yaml(output_folder="dataset"):
     data = {
@@ -206,6 +459,20 @@ def write_data_yaml(output_folder="dataset"):
         yaml.safe_dump(data, f)
 
 if __name__ == "__main__":
-    create_dataset(n_per_class=1200, split_ratio=0.85)
-    write_data_yaml()
+    parser = argparse.ArgumentParser(description="Generate a synthetic YOLO dataset")
+    parser.add_argument("--output", default="dataset", help="Dataset root folder")
+    parser.add_argument("--n-per-class", type=int, default=1200)
+    parser.add_argument("--split-ratio", type=float, default=0.85)
+    parser.add_argument("--seed", type=int, default=0, help="Master seed (per-job seeds derive from it)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip jobs whose image and label already exist and are valid")
+    parser.add_argument("--workers", type=int, default=NUM_THREADS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="Jobs handed to a worker at a time")
+    args = parser.parse_args()
+
+    create_dataset(args.output, n_per_class=args.n_per_class,
+                   split_ratio=args.split_ratio, seed=args.seed, resume=args.resume,
+                   workers=args.workers, chunk_size=args.chunk_size)
+    write_data_yaml(args.output)
     print("✅ YOLO dataset ready — no overlaps, no leftover files, clean shadows.")
@@ -1,8 +1,10 @@
 """Data storage and management for detection results."""
 
 import threading
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 import time
+import uuid
 
 
 class DataStorage:
@@ -11,17 +13,54 @@ class DataStorage:
         self._latest_data = {}
         self._detection_history = []
         self._max_history = 100
+        # Recent binary frames (raw JPEG bytes, never re-encoded) by frame id, so a
+        # client always gets the image that belongs to the detections it read.
+        # The epoch makes ETags from a previous server run never match.
+        self._epoch = uuid.uuid4().hex[:8]
+        self._frame_id = 0
+        self._frames: "OrderedDict[int, bytes]" = OrderedDict()
+        self._max_frames = 8
 
     def store_data(self, data: Dict):
         """Store the latest detection data."""
         with self._lock:
-            data['timestamp'] = time.time()
-            self._latest_data = data
-            self._detection_history.append(data)
-            
-            # Keep only recent history
-            if len(self._detection_history) > self._max_history:
-                self._detection_history.pop(0)
+            self._store(data)
+
+    def _store(self, data: Dict):
+        data['timestamp'] = time.time()
+        self._latest_data = data
+        self._detection_history.append(data)
+
+        # Keep only recent history
+        if len(self._detection_history) > self._max_history:
+            self._detection_history.pop(0)
+
+    def store_frame(self, meta: Dict, jpeg_bytes: bytes) -> int:
+        """Store detection metadata plus the raw JPEG; returns the frame id."""
+        with self._lock:
+            self._frame_id += 1
+            self._frames[self._frame_id] = jpeg_bytes
+            if len(self._frames) > self._max_frames:
+                self._frames.popitem(last=False)
+            meta['frame_id'] = self._frame_id
+            meta['image_url'] = f'/frame/{self._frame_id}.jpg'
+            meta['image_bytes'] = len(jpeg_bytes)
+            self._store(meta)
+            return self._frame_id
+
+    def get_frame(self, frame_id: int) -> Tuple[Optional[bytes], Optional[str]]:
+        """JPEG bytes of a recent frame and their ETag, or (None, None) if evicted/unknown."""
+        with self._lock:
+            jpeg = self._frames.get(frame_id)
+            if jpeg is None:
+                return None, None
+            return jpeg, f'"{self._epoch}-{frame_id}"'
+
+    def get_latest_frame(self) -> Tuple[Optional[bytes], Optional[str]]:
+        """Latest JPEG bytes and their ETag, or (None, None)."""
+        with self._lock:
+            frame_id = next(reversed(self._frames), None)
+        return self.get_frame(frame_id) if frame_id is not None else (None, None)
 
     def get_latest_data(self) -> Dict:
         """Get the most recent detection data."""
@@ -43,6 +82,7 @@ class DataStorage:
         with self._lock:
             self._latest_data = {}
             self._detection_history = []
+            self._frames.clear()
 
 
 # Global data storage instance
@@ -1,25 +1,50 @@
 """Module for sending detection data to Flask server."""
 
+import os
+import sys
+import queue
+import threading
 import requests
-import base64
+from requests.adapters import HTTPAdapter
 import time
+from collections import deque
 from io import BytesIO
 from PIL import Image
 import numpy as np
 
 from config import FLASK_PORT
 
+# Wire format and latest-wins queue shared with the Pi sender (raspi/, stdlib only)
+RASPI_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "raspi"))
+sys.path.insert(0, RASPI_DIR)
+from frame_codec import FRAME_CONTENT_TYPE, pack_frame
+from pipeline import STOP, LatestQueue
+
 
 class DetectionSender:
     def __init__(self):
         self.flask_url = f"http://localhost:{FLASK_PORT}"
+        # Keep-alive: one pooled connection reused for every frame
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.headers['Content-Type'] = FRAME_CONTENT_TYPE
+        # Background sending: a single pending slot, newer frames replace older ones
+        self._pending = LatestQueue(1)
+        # Each worker gets its own stop event and queue, so a worker that outlives
+        # stop()'s join timeout can never be revived by the next start
+        self._worker = None
+        self._worker_stop = None
+        # Counters are updated from both the caller and the worker thread
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=100)
+        self.sent = self.failed = 0
     
     def prepare_payload(self, detections, image_array, timestamp=None):
-        """Prepare detection payload with all required fields."""
+        """Prepare the frame header and JPEG bytes (sent raw, no base64)."""
         if timestamp is None:
             timestamp = time.strftime("%Y%m%d_%H%M%S")
         
-        # Convert image to base64
+        # Encode image as JPEG
         if image_array is not None:
             # Get image dimensions for crop_shape
             if len(image_array.shape) == 3:
@@ -27,18 +52,18 @@ class DetectionSender:
             else:
                 h, w = image_array.shape
             
-            # Convert to PIL Image and then to base64
+            # Convert to PIL Image and then to JPEG bytes
             if image_array.dtype != np.uint8:
                 image_array = (image_array * 255).astype(np.uint8)
             
             pil_image = Image.fromarray(image_array)
             buffer = BytesIO()
             pil_image.save(buffer, format='JPEG', quality=60)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
+            jpeg_bytes = buffer.getvalue()
         else:
             # Default dimensions if no image
             w, h = 640, 480
-            image_base64 = None
+            jpeg_bytes = b''
         
         # Prepare payload with MANDATORY crop_shape
         payload = {
@@ -47,16 +72,12 @@ class DetectionSender:
             'timestamp': timestamp
         }
         
-        # Add image only if available
-        if image_base64:
-            payload['image'] = image_base64
-        
-        return payload
+        return payload, jpeg_bytes
     
     def send_detection(self, detections, image_array=None, timestamp=None):
-        """Send detection data to Flask server."""
+        """Send detection data to Flask server (binary /frame endpoint)."""
         try:
-            payload = self.prepare_payload(detections, image_array, timestamp)
+            payload, jpeg_bytes = self.prepare_payload(detections, image_array, timestamp)
             
             # Validate payload
             if 'crop_shape' not in payload:
@@ -64,21 +85,79 @@ class DetectionSender:
             
             print(f"Sending {len(detections)} detections with crop_shape {payload['crop_shape']}")
             
-            response = requests.post(
-                f"{self.flask_url}/data",
-                json=payload,
+            start = time.perf_counter()
+            response = self.session.post(
+                f"{self.flask_url}/frame",
+                data=pack_frame(payload, jpeg_bytes),
                 timeout=10
             )
             
             if response.status_code == 200:
+                ms = (time.perf_counter() - start) * 1000
+                with self._lock:
+                    self.sent += 1
+                    self._latencies.append(ms)
                 result = response.json()
                 status = result.get('status', 'unknown')
-                print(f"Detection sent! BLE Status: {status}")
+                print(f"Detection sent in {ms:.0f} ms! BLE Status: {status}")
                 return True
             else:
+                with self._lock:
+                    self.failed += 1
                 print(f"Send failed: {response.status_code}")
                 return False
                 
         except Exception as e:
+            with self._lock:
+                self.failed += 1
             print(f"Send error: {e}")
             return False
+    
+    def send_detection_async(self, detections, image_array=None, timestamp=None):
+        """Queue a frame for the background sender and return immediately.
+        
+        If the previous frame has not been sent yet it is dropped (latest wins),
+        so a slow server never blocks the caller. Returns False on a drop.
+        """
+        with self._lock:
+            if self._worker is None:
+                self._worker_stop = threading.Event()
+                self._worker = threading.Thread(target=self._send_loop, args=(self._worker_stop, self._pending),
+                                                name="DetectionSender", daemon=True)
+                self._worker.start()
+        return self._pending.put((detections, image_array, timestamp))
+    
+    def _send_loop(self, stop_event, pending):
+        while not stop_event.is_set():
+            try:
+                item = pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is STOP:
+                break
+            self.send_detection(*item)
+    
+    def stop(self, timeout=5):
+        """Stop the background sender (a pending frame is discarded) and close the session."""
+        with self._lock:
+            worker, self._worker = self._worker, None
+            stop_event, self._worker_stop = self._worker_stop, None
+            pending, self._pending = self._pending, LatestQueue(1)
+        if worker is not None:
+            stop_event.set()
+            pending.close()
+            worker.join(timeout)
+        self.session.close()
+    
+    def stats(self):
+        """Send counters plus send latency (ms) over the last 100 frames."""
+        with self._lock:
+            lat = sorted(self._latencies)
+            return {
+                'sent': self.sent,
+                'failed': self.failed,
+                'dropped': self._pending.dropped,
+                'pending': self._pending.qsize(),
+                'latency_ms_p50': round(lat[len(lat) // 2], 1) if lat else None,
+                'latency_ms_max': round(lat[-1], 1) if lat else None,
+            }
@@ -1,12 +1,13 @@
 # Flask server pentru primirea datelor de detectie si servirea catre Streamlit
 # Creat pentru integrarea cu robotic arm prin BLE
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 import asyncio
 import sys
 import os
 import threading
 import copy
+import json
 
 # Hack pentru importuri - adaug directorul curent la path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -28,6 +29,11 @@ except Exception as e:
     print(f"Nu pot incarca data_store: {e}")
     data_store = None
 
+# Formatul binar /frame e comun cu Pi-ul (raspi/frame_codec.py, doar stdlib)
+RASPI_DIR = os.path.abspath(os.path.join(current_dir, "..", "..", "..", "raspi"))
+sys.path.insert(0, RASPI_DIR)
+from frame_codec import FRAME_CONTENT_TYPE, unpack_frame
+
 # Config pentru server
 try:
     from config import FLASK_HOST, FLASK_PORT
@@ -65,6 +71,16 @@ class FlaskServer:
         self._setup_routes()
         print("Flask server ready")
 
+    def _send_ble(self, payload):
+        # Trimit prin BLE daca pot
+        if self.ble_handler:
+            status = asyncio.run(self.ble_handler.send_data(payload))
+            print(f"BLE: {status}")
+        else:
+            print("BLE nu e disponibil")
+            status = 'no_ble'
+        return status
+
     def _setup_routes(self):
         # Setup pentru toate rutele Flask
         
@@ -85,13 +101,7 @@ class FlaskServer:
                 if data_store:
                     data_store.store_data(payload)
                 
-                # Trimit prin BLE daca pot
-                if self.ble_handler:
-                    status = asyncio.run(self.ble_handler.send_data(payload))
-                    print(f"BLE: {status}")
-                else:
-                    print("BLE nu e disponibil")
-                    status = 'no_ble'
+                status = self._send_ble(payload)
                 
                 return jsonify({
                     'status': status, 
@@ -103,6 +113,67 @@ class FlaskServer:
                 traceback.print_exc()
                 return jsonify({'error': str(e)}), 500
 
+        @self.app.route('/frame', methods=['POST'])
+        def receive_frame():
+            # Varianta binara pentru /data: JPEG-ul vine ca bytes (fara base64/JSON),
+            # e pastrat asa cum e si servit inapoi pe /frame/<frame_id>.jpg
+            try:
+                if request.mimetype == 'multipart/form-data':
+                    meta = json.loads(request.form.get('meta', '{}'))
+                    image = request.files.get('image')
+                    jpeg = image.read() if image else b''
+                elif request.mimetype in (FRAME_CONTENT_TYPE, 'application/octet-stream'):
+                    meta, jpeg = unpack_frame(request.get_data(cache=False))
+                else:
+                    return jsonify({'error': f'Astept {FRAME_CONTENT_TYPE} sau multipart/form-data'}), 415
+                if not isinstance(meta, dict):
+                    return jsonify({'error': 'meta trebuie sa fie obiect JSON'}), 400
+            except ValueError as e:
+                return jsonify({'error': f'Frame invalid: {e}'}), 400
+
+            try:
+                frame_id = None
+                if data_store:
+                    if jpeg:
+                        frame_id = data_store.store_frame(meta, jpeg)
+                    else:
+                        data_store.store_data(meta)
+
+                status = self._send_ble(meta)
+
+                return jsonify({
+                    'status': status,
+                    'received_count': len(meta.get('detections', [])),
+                    'frame_id': frame_id
+                }), 200
+            except Exception as e:
+                print(f"Eroare in receive_frame: {e}")
+                import traceback
+                traceback.print_exc()
+                return jsonify({'error': str(e)}), 500
+
+        def send_jpeg(jpeg, etag, cache_control):
+            # Bytes-ii JPEG exact cum au venit; ETag-ul permite 304 daca nu s-a schimbat
+            headers = {'ETag': etag, 'Cache-Control': cache_control}
+            if request.if_none_match.contains(etag.strip('"')):
+                return Response(status=304, headers=headers)
+            return Response(jpeg, mimetype='image/jpeg', headers=headers)
+
+        @self.app.route('/frame/<int:frame_id>.jpg', methods=['GET'])
+        def frame_by_id(frame_id):
+            # Imaginea exacta a payload-ului cu acest frame_id (image_url din /get)
+            jpeg, etag = data_store.get_frame(frame_id) if data_store else (None, None)
+            if jpeg is None:
+                return jsonify({'error': f'Frame-ul {frame_id} nu mai e disponibil'}), 404
+            return send_jpeg(jpeg, etag, 'private, max-age=300')  # nu se mai schimba
+
+        @self.app.route('/frame/latest.jpg', methods=['GET'])
+        def latest_frame():
+            jpeg, etag = data_store.get_latest_frame() if data_store else (None, None)
+            if jpeg is None:
+                return jsonify({'error': 'Nu am niciun frame'}), 404
+            return send_jpeg(jpeg, etag, 'no-cache')
+
         @self.app.route('/ready', methods=['GET'])
         def check_ready():
             # Verific daca bratul e gata pentru urmatoarea comanda
@@ -15,6 +15,18 @@ class ImageProcessor:
         
         try:
             img_data = base64.b64decode(img_b64)
+        except Exception as e:
+            print(f"Error decoding image: {e}")
+            return None
+        return ImageProcessor.decode_image_bytes(img_data)
+
+    @staticmethod
+    def decode_image_bytes(img_data: bytes) -> Optional[np.ndarray]:
+        """Decode raw JPEG/PNG bytes (e.g. from /frame/<frame_id>.jpg) to an RGB array."""
+        if not img_data:
+            return None
+
+        try:
             img_array = np.frombuffer(img_data, dtype=np.uint8)
             img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
             return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
@@ -43,18 +55,21 @@ class ImageProcessor:
         return img_copy
 
     @staticmethod
-    def process_detection_data(data: Dict) -> Tuple[Optional[np.ndarray], str]:
-        """Process detection data and return image with status."""
+    def process_detection_data(data: Dict, frame: Optional[np.ndarray] = None) -> Tuple[Optional[np.ndarray], str]:
+        """Process detection data and return image with status.
+
+        `frame` is the already decoded binary frame (see /frame/<frame_id>.jpg) for
+        payloads that carry an image_url instead of a base64 image.
+        """
         detections = data.get("detections", [])
         
         # If we have detections, show processed image with annotations
         if detections:
             img_b64 = data.get("image")
-            if img_b64:
-                img = ImageProcessor.decode_base64_image(img_b64)
-                if img is not None:
-                    img_with_detections = ImageProcessor.draw_detections(img, detections)
-                    return img_with_detections, f"Detections: {len(detections)}"
+            img = ImageProcessor.decode_base64_image(img_b64) if img_b64 else frame
+            if img is not None:
+                img_with_detections = ImageProcessor.draw_detections(img, detections)
+                return img_with_detections, f"Detections: {len(detections)}"
         
         # If no detections, show raw image
         raw_img_b64 = data.get("raw_image")
@@ -62,5 +77,7 @@ class ImageProcessor:
             img = ImageProcessor.decode_base64_image(raw_img_b64)
             if img is not None:
                 return img, "No detections - showing raw image"
+        if frame is not None:
+            return frame, "No detections - showing raw image"
         
         return None, "No image data available"
@@ -2,9 +2,22 @@ import streamlit as st
 import cv2
 import numpy as np
 import os
+import sys
 import json
+import hashlib
 from datetime import datetime
 
+# Helperii de extracție sunt în ExtractAndPlace/extraction.py
+EXTRACT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+sys.path.insert(0, EXTRACT_DIR)
+from extraction import preview_levels, pyramid_down, scaled_ksize, mask_cleanup
+from hsv_autocalib import BINS, reference_histogram, capture_histogram, fit_histograms
+
+PREVIEW_MAX_SIDE = 1280
+MORPH_KSIZE = 5
+CALIB_DEFAULT_CAPTURES = 3
+CALIB_MAX_CAPTURES = 12
+
 # --- CONFIG ---
 def initialize_directories():
     """Initialize and create necessary directories."""
@@ -43,18 +56,14 @@ def save_hsv_config(config_file, hsv_values):
     with open(config_file, "w") as f:
         json.dump(hsv_values, f)
 
-def process_image_mask(img, hsv_values):
+def process_image_mask(img, hsv_values, hsv_img=None, ksize=MORPH_KSIZE):
     """Process image and return mask for object detection."""
-    hsv_img = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    if hsv_img is None:
+        hsv_img = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
     lower = np.array([hsv_values["lh"], hsv_values["ls"], hsv_values["lv"]])
     upper = np.array([hsv_values["uh"], hsv_values["us"], hsv_values["uv"]])
     mask = cv2.inRange(hsv_img, lower, upper)
-    
-    kernel = np.ones((5,5), np.uint8)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-    
-    return mask
+    return mask_cleanup(ksize)(mask)
 
 def extract_objects(img, mask):
     """Extract objects from image using mask."""
@@ -71,6 +80,66 @@ def extract_objects(img, mask):
     
     return obj_images
 
+# --- Cache ---
+# Streamlit rulează din nou tot scriptul la fiecare mișcare de slider. Imaginea
+# decodată și conversia HSV depind doar de conținutul fișierului, deci sunt
+# memoizate după hash-ul fișierului; masca și obiectele după (hash, praguri HSV).
+# La o mișcare de slider se refac doar inRange + morfologia, iar salvarea refolosește
+# decupajele deja calculate. max_entries limitează memoria (~36 MB / imagine 12 MP).
+# Cu previzualizarea rapidă, masca și obiectele afișate se calculează pe o copie
+# micșorată cu pyrDown (`levels` niveluri, kernel morfologic scalat); salvarea
+# folosește mereu levels=0, adică rezoluția nativă.
+HSV_KEYS = ("lh", "ls", "lv", "uh", "us", "uv")
+
+def _readonly(arr):
+    arr.flags.writeable = False
+    return arr
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _file_digest(path, mtime_ns, size):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def file_digest(path):
+    """Hash-ul conținutului fișierului (recalculat doar dacă se schimbă mtime/dimensiunea)."""
+    stat = os.stat(path)
+    return _file_digest(path, stat.st_mtime_ns, stat.st_size)
+
+@st.cache_resource(max_entries=3, show_spinner=False)
+def cached_image(digest, _path):
+    img = cv2.imread(_path)
+    return None if img is None else _readonly(img)
+
+@st.cache_resource(max_entries=6, show_spinner=False)
+def cached_preview(digest, _path, levels):
+    if levels == 0:
+        return cached_image(digest, _path)
+    return _readonly(pyramid_down(cached_image(digest, _path), levels))
+
+@st.cache_resource(max_entries=6, show_spinner=False)
+def cached_hsv(digest, _path, levels=0):
+    return _readonly(cv2.cvtColor(cached_preview(digest, _path, levels), cv2.COLOR_BGR2HSV))
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def cached_mask(digest, _path, hsv_key, levels=0):
+    hsv_values = dict(zip(HSV_KEYS, hsv_key))
+    img = cached_preview(digest, _path, levels)
+    mask = process_image_mask(img, hsv_values, cached_hsv(digest, _path, levels),
+                              ksize=scaled_ksize(MORPH_KSIZE, levels))
+    return _readonly(mask)
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def cached_objects(digest, _path, hsv_key, levels=0):
+    objects = extract_objects(cached_preview(digest, _path, levels),
+                              cached_mask(digest, _path, hsv_key, levels))
+    return [_readonly(o) for o in objects]
+
+def hsv_key(hsv_values):
+    return tuple(int(hsv_values[k]) for k in HSV_KEYS)
+
 def save_objects(img_path, objects, output_folder):
     """Save extracted objects as PNG files."""
     os.makedirs(output_folder, exist_ok=True)
@@ -86,11 +155,10 @@ def save_objects(img_path, objects, output_folder):
 
 def save_and_advance():
     """Save objects and advance to next image."""
-    # Regenerate processing for current image
-    img = cv2.imread(st.session_state.current_img_path)
-    mask = process_image_mask(img, st.session_state.current_hsv)
-    objects = extract_objects(img, mask)
-    
+    # Full resolution; reuses the preview crops when fast preview is off (same hash + thresholds)
+    img_path = st.session_state.current_img_path
+    objects = cached_objects(file_digest(img_path), img_path, hsv_key(st.session_state.current_hsv))
+
     count = save_objects(st.session_state.current_img_path, objects, st.session_state.output_folder)
     st.success(f"S-au salvat {count} obiecte în {st.session_state.output_folder}")
     
@@ -135,6 +203,10 @@ uv = st.sidebar.slider("Valoare Maximă", 0, 255, hsv_config.get("uv", 255))
 
 current_hsv = {"lh": lh, "ls": ls, "lv": lv, "uh": uh, "us": us, "uv": uv}
 
+fast_preview = st.sidebar.checkbox(
+    "Previzualizare rapidă (rezoluție redusă)", value=True,
+    help="Masca și obiectele afișate se calculează pe o copie micșorată; salvarea folosește rezoluția nativă.")
+
 if st.sidebar.button("Salvează pragurile", key="save_thresh"):
     save_hsv_config(paths['config_file'], current_hsv)
     st.sidebar.success("Pragurile au fost salvate.")
@@ -151,6 +223,45 @@ if not image_paths:
     st.info("Nu s-au găsit imagini.")
     st.stop()
 
+# Auto-calibration from an empty-table reference capture (see hsv_autocalib.py)
+@st.cache_data(max_entries=4, show_spinner="Loading reference...")
+def cached_reference(bg_path, bg_mtime_ns):
+    return reference_histogram(bg_path)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_capture_hist(path, mtime_ns, bg_path, bg_mtime_ns):
+    # histograma per imagine: la o nouă selecție se decodează doar capturile noi
+    background, _ = cached_reference(bg_path, bg_mtime_ns)
+    return capture_histogram(path, background)
+
+with st.sidebar.expander("Auto-calibrare HSV"):
+    names = [os.path.basename(p) for p in image_paths]
+    bg_name = st.selectbox("Captura mesei goale", names)
+    capture_names = [n for n in names if n != bg_name]
+    selected = st.multiselect("Capturi cu obiecte", capture_names,
+                              default=capture_names[:CALIB_DEFAULT_CAPTURES],
+                              max_selections=CALIB_MAX_CAPTURES)
+    if st.button("Calculează pragurile", key="auto_calib", disabled=not selected):
+        bg_path = os.path.join(input_folder, bg_name)
+        bg_mtime = os.stat(bg_path).st_mtime_ns
+        try:
+            _, neg_hist = cached_reference(bg_path, bg_mtime)
+            pos_hist = np.zeros(BINS, np.int64)
+            for name in selected:
+                path = os.path.join(input_folder, name)
+                pos_hist += cached_capture_hist(path, os.stat(path).st_mtime_ns, bg_path, bg_mtime)
+            auto_hsv, stats = fit_histograms(pos_hist, neg_hist)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            # sliderele își iau valorile implicite din config la următoarea rulare
+            save_hsv_config(paths['config_file'], auto_hsv)
+            st.session_state.auto_calib_stats = stats
+            st.rerun()
+    if "auto_calib_stats" in st.session_state:
+        stats = st.session_state.auto_calib_stats
+        st.caption(f"TPR {stats['tpr']:.3f}, FPR {stats['fpr']:.3f}")
+
 # Initialize current index
 if 'idx' not in st.session_state:
     st.session_state.idx = 0
@@ -176,15 +287,22 @@ st.session_state.current_img_path = img_path
 
 st.write(f"### Imaginea {idx+1}/{len(image_paths)}: {os.path.basename(img_path)}")
 
-# Read image and compute mask
-img = cv2.imread(img_path)
-mask = process_image_mask(img, current_hsv)
-obj_images = extract_objects(img, mask)
+# Read image and compute mask (memoized, see Cache above)
+digest = file_digest(img_path)
+img = cached_image(digest, img_path)
+if img is None:
+    st.error(f"Nu pot citi imaginea {img_path}")
+    st.stop()
+levels = preview_levels(img.shape, PREVIEW_MAX_SIDE) if fast_preview else 0
+preview_img = cached_preview(digest, img_path, levels)
+mask = cached_mask(digest, img_path, hsv_key(current_hsv), levels)
+obj_images = cached_objects(digest, img_path, hsv_key(current_hsv), levels)
 
 # Display original & mask
 col1, col2 = st.columns(2)
-col1.image(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), caption="Original", use_container_width=True)
-col2.image(mask, caption="Mască", use_container_width=True)
+col1.image(cv2.cvtColor(preview_img, cv2.COLOR_BGR2RGB), caption="Original", use_container_width=True)
+col2.image(mask, caption="Mască" if levels == 0 else f"Mască (previzualizare 1/{2 ** levels})",
+           use_container_width=True)
 
 # Display objects in grid of 3
 st.write("### Obiecte Extrase (PNG-uri transparente)")
@@ -1,10 +1,15 @@
 import streamlit as st
-import cv2
-import numpy as np
 import os
+import sys
 from datetime import datetime
 import shutil
 
+EXTRACT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+sys.path.insert(0, EXTRACT_DIR)
+from shape_features import OUTLINE_SHAPES
+from classify_run import classify_run
+from thumbnails import thumbnail_grid
+
 # --- CONFIG ---
 base_dir = os.path.dirname(os.path.abspath(__file__))
 TEMP_ROOT = os.path.join(base_dir, "temp")
@@ -32,70 +37,34 @@ if not images:
     st.stop()
 
 
-# Shape classification
-def classify_shape(obj):
-    mask = obj[:, :, 3]  # Alpha channel
-    kern = np.ones((5, 5), np.uint8)
-    m = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kern)
-    m = cv2.morphologyEx(m, cv2.MORPH_CLOSE, kern)
-
-    cnts, hierarchy = cv2.findContours(m, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
-    if not cnts or hierarchy is None:
-        return "unknown"
-
-    hierarchy = hierarchy[0]  # shape: (num_contours, 4)
-    outer_cnts = [cnts[i] for i, h in enumerate(hierarchy) if h[3] == -1]
-    hole_cnts = [cnts[i] for i, h in enumerate(hierarchy) if h[3] != -1]
-
-    if len(outer_cnts) == 1 and len(hole_cnts) == 1:
-        outer = outer_cnts[0]
-        inner = hole_cnts[0]
-
-        # Check if the inner contour is fairly circular
-        area = cv2.contourArea(inner)
-        (x, y), r = cv2.minEnclosingCircle(inner)
-        circle_area = np.pi * r * r
-        circularity_error = abs(area - circle_area) / circle_area
+# Shape classification: batch over the whole run, persisted in <run>/shapes.csv.
+# Only new/changed PNGs are reclassified; the cache is keyed on the folder's mtime
+# (files added/removed), the "Reclassify" button forces a check of every file.
+@st.cache_data(max_entries=8, show_spinner="Classifying objects...")
+def load_shapes(obj_dir, dir_mtime_ns, refresh):
+    rows, stats = classify_run(obj_dir)
+    return [(row["file"], row["shape"]) for row in rows], stats
 
-        # Also check placement of the hole: not too close to the edge
-        ox, oy, ow, oh = cv2.boundingRect(outer)
-        cx, cy, cr = x, y, r
-        if circularity_error < 0.25 and ox + 0.2*ow < cx < ox + 0.8*ow:
-            return "arch"
+if "refresh" not in st.session_state:
+    st.session_state.refresh = 0
+if st.sidebar.button("Reclassify changed files"):
+    st.session_state.refresh += 1
 
-    # Fallback to classic logic
-    cnt = max(cnts, key=cv2.contourArea)
-    approx = cv2.approxPolyDP(cnt, 0.04 * cv2.arcLength(cnt, True), True)
-    v = len(approx)
-
-    if v == 3:
-        return "triangle"
-    if v == 4:
-        x, y, w, h = cv2.boundingRect(approx)
-        return "square" if 0.95 <= w / float(h) <= 1.05 else "rectangle"
-    if v == 5:
-        return "pentagon"
-
-    # Circle fallback
-    area = cv2.contourArea(cnt)
-    (x, y), r = cv2.minEnclosingCircle(cnt)
-    return "circle" if abs(area - np.pi * r * r) < 0.1 * np.pi * r * r else "unknown"
+items, stats = load_shapes(obj_dir, os.stat(obj_dir).st_mtime_ns, st.session_state.refresh)
+for name, error in stats["errors"].items():
+    st.warning(f"{name}: {error}")
 
 # Shapes order
-shapes = ["triangle", "square", "rectangle", "pentagon", "circle", "arch", "unknown"]
-
-# Load and classify images
-files = list_pngs(obj_dir)
-if not files:
-    st.error("No PNG images found in selected run.")
-    st.stop()
-items = []
-for fname in files:
-    img = cv2.imread(os.path.join(obj_dir, fname), cv2.IMREAD_UNCHANGED)
-    rgba = cv2.cvtColor(img, cv2.COLOR_BGRA2RGBA)
-    shape = classify_shape(img)
-    col = cols[idx % 3]
-    col.image(rgba, caption=f"{fname}\n-> {shape}", use_container_width=True)
+shapes = list(OUTLINE_SHAPES)
+counts = {s: sum(1 for _, shape in items if shape == s) for s in shapes}
+st.sidebar.write({s: n for s, n in counts.items() if n})
+selected_shapes = st.sidebar.multiselect("Show shapes", shapes, default=[s for s in shapes if counts[s]])
+
+# Display classified objects (paginated thumbnails, see thumbnails.py)
+visible = [(fname, shape) for fname, shape in items if shape in selected_shapes]
+thumbnail_grid([os.path.join(obj_dir, fname) for fname, _ in visible],
+               captions=[f"{fname} -> {shape}" for fname, shape in visible],
+               key=f"shapes_{selected_run}", columns=3)
 
 # Save callback
 def save_all():
@@ -72,6 +72,30 @@ class StreamlitUI:
             st.error(f"❌ Error fetching data: {e}")
             return {}
 
+    def fetch_frame(self, data):
+        """Decoded binary frame for payloads sent to /frame (they carry image_url).
+
+        image_url names the exact frame (/frame/<frame_id>.jpg), so the detections
+        are always drawn on their own image, even if a newer frame arrived since /get.
+        A frame id never changes, so the same frame is neither downloaded nor
+        decoded twice (cached per URL). None if the frame is no longer available.
+        """
+        url = data.get("image_url")
+        if not url:
+            return None
+        cache = st.session_state.setdefault("frame_cache", {})
+        if cache.get("url") == url and cache.get("img") is not None:
+            return cache["img"]
+        try:
+            response = requests.get(f"{self.flask_url}{url}", timeout=3)
+        except requests.exceptions.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        img = self.image_processor.decode_image_bytes(response.content)
+        cache.update(url=url, img=img)
+        return img
+
     def display_server_status(self):
         """Display server status in sidebar."""
         with st.sidebar:
@@ -236,7 +260,7 @@ class StreamlitUI:
                 
                 if data:
                     # Display image
-                    img, status = self.image_processor.process_detection_data(data)
+                    img, status = self.image_processor.process_detection_data(data, self.fetch_frame(data))
                     if img is not None:
                         image_placeholder.image(
                             img, 
@@ -262,7 +286,7 @@ class StreamlitUI:
             if self.server_running:
                 data = self.fetch_detection_data()
                 if data:
-                    img, status = self.image_processor.process_detection_data(data)
+                    img, status = self.image_processor.process_detection_data(data, self.fetch_frame(data))
                     if img is not None:
                         image_placeholder.image(
                             img, 
@@ -0,0 +1,64 @@
+"""
+Bancă de asset-uri decodate o singură dată (fundaluri + obiecte RGBA).
+
+Fundalurile sunt stocate deja redimensionate la dimensiunea finală, obiectele
+așa cum sunt pe disc (BGRA). Banca se construiește în procesul părinte înainte
+de a porni pool-ul și se transmite workerilor prin `initargs`:
+  - cu start method "fork" (Linux), workerii moștenesc array-urile direct din
+    memoria părintelui (copy-on-write, nimic nu se copiază cât timp sunt doar citite);
+  - cu "spawn" (Windows/macOS), banca este serializată o singură dată per worker,
+    nu per imagine.
+"""
+import os
+import cv2
+
+
+class AssetBank:
+    def __init__(self, bg_size=(640, 550)):
+        self.bg_size = bg_size
+        self.backgrounds = {}
+        self.objects = {}
+
+    @classmethod
+    def load(cls, bg_files, obj_files, object_folder, bg_size=(640, 550)):
+        """Decodează toate fundalurile (redimensionate la bg_size) și obiectele RGBA."""
+        bank = cls(bg_size)
+        for path in bg_files:
+            img = cv2.imread(path)
+            if img is None:
+                print(f"[WARN] Could not read background: {path}")
+                continue
+            bank.backgrounds[path] = _readonly(cv2.resize(img, bg_size))
+
+        for name in obj_files:
+            fg = cv2.imread(os.path.join(object_folder, name), cv2.IMREAD_UNCHANGED)
+            if fg is None or fg.ndim != 3 or fg.shape[2] != 4:
+                print(f"[WARN] Invalid object (missing alpha): {name}")
+                continue
+            bank.objects[name] = _readonly(fg)
+        return bank
+
+    def background(self, path):
+        """Fundalul decodat (read-only) sau None dacă nu e în bancă."""
+        return self.backgrounds.get(path)
+
+    def object(self, name):
+        """Obiectul BGRA decodat (read-only) sau None dacă nu e în bancă."""
+        return self.objects.get(name)
+
+    @property
+    def nbytes(self):
+        return (sum(a.nbytes for a in self.backgrounds.values()) +
+                sum(a.nbytes for a in self.objects.values()))
+
+    def report(self):
+        bg_bytes = sum(a.nbytes for a in self.backgrounds.values())
+        obj_bytes = sum(a.nbytes for a in self.objects.values())
+        return (f"{len(self.backgrounds)} backgrounds ({bg_bytes / 2**20:.1f} MiB), "
+                f"{len(self.objects)} objects ({obj_bytes / 2**20:.1f} MiB), "
+                f"total {self.nbytes / 2**20:.1f} MiB")
+
+
+def _readonly(arr):
+    arr.flags.writeable = False
+    return arr
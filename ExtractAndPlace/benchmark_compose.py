@@ -0,0 +1,230 @@
+"""
+Benchmark pentru pipeline-ul de compunere sintetică.
+
+Generează în memorie obiecte RGBA și fundaluri fixe (fără fișiere de intrare),
+măsoară fiecare etapă la mai multe dimensiuni de obiect și număr de workeri,
+și scrie rezultatele ca JSON, comparabile de la o rulare la alta.
+
+Exemple:
+    python benchmark_compose.py --out bench.json
+    python benchmark_compose.py --compare bench.json --threshold 0.15
+
+Cu --compare, scriptul iese cu cod 1 dacă vreo etapă e mai lentă decât
+baseline-ul cu mai mult de --threshold (fracție, 0.10 = 10%).
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+import importlib.util
+import multiprocessing as mp
+
+import cv2
+import numpy as np
+
+from compose_images import overlay_image, add_shadow, add_shadow_smooth_pro, ArrayCache
+from asset_bank import AssetBank
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CANVAS_W, CANVAS_H = 640, 550
+
+
+def load_composer():
+    """Importă 4compose_images-threading.py (numele nu e un identificator valid)."""
+    name = "compose_threading"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(BASE_DIR, "4compose_images-threading.py"))
+    module = importlib.util.module_from_spec(spec)
+    # înregistrat înainte de exec, ca funcțiile să poată fi trimise workerilor (fork)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_object(size, seed=0):
+    """Obiect BGRA sintetic: un poligon plin, culoare fixă, fundal transparent."""
+    rng = np.random.default_rng(seed)
+    obj = np.zeros((size, size, 4), np.uint8)
+    angles = np.sort(rng.uniform(0, 2 * np.pi, 7))
+    radii = rng.uniform(0.3, 0.48, 7) * size
+    pts = np.stack([size / 2 + radii * np.cos(angles),
+                    size / 2 + radii * np.sin(angles)], axis=1).astype(np.int32)
+    color = tuple(int(c) for c in rng.integers(0, 256, 3)) + (255,)
+    cv2.fillPoly(obj, [pts], color)
+    return obj
+
+
+def make_background(seed=0):
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, (CANVAS_H // 8, CANVAS_W // 8, 3), dtype=np.uint8)
+    return cv2.resize(noise, (CANVAS_W, CANVAS_H), interpolation=cv2.INTER_CUBIC)
+
+
+def time_call(fn, repeat, warmup=2):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "min_ms": round(min(samples), 4),
+        "repeat": repeat,
+    }
+
+
+def bench_stages(sizes, repeat):
+    composer = load_composer()
+    bg = make_background()
+    results = {}
+    for size in sizes:
+        fg = make_object(size)
+        x, y = (CANVAS_W - size) // 2, (CANVAS_H - size) // 2
+        shadow_args = dict(direction=(15, 15), blur_gauss=121, use_bilateral=True,
+                           bilateral_params=(15, 100, 100), opacity=0.35)
+        cache = ArrayCache()
+
+        results[f"overlay_image/{size}"] = time_call(
+            lambda: overlay_image(bg.copy(), fg, x, y), repeat)
+        results[f"add_shadow/{size}"] = time_call(
+            lambda: add_shadow(fg, bg.copy(), x, y), repeat)
+        for mode in ("gauss", "separable", "downscale"):
+            results[f"add_shadow_smooth_pro/{mode}/{size}"] = time_call(
+                lambda: add_shadow_smooth_pro(fg, bg.copy(), x, y, blur_mode=mode,
+                                              cache=None, **shadow_args), repeat)
+        results[f"add_shadow_smooth_pro/cached/{size}"] = time_call(
+            lambda: add_shadow_smooth_pro(fg, bg.copy(), x, y, cache_key=("bench", size),
+                                          cache=cache, **shadow_args), repeat)
+        results[f"rotate_image/{size}"] = time_call(
+            lambda: composer.rotate_image(fg, 17), repeat)
+    return results
+
+
+def build_bank(sizes):
+    bank = AssetBank((CANVAS_W, CANVAS_H))
+    bank.backgrounds = {f"bg{i}": make_background(i) for i in range(3)}
+    names_by_class = {}
+    for k, cls in enumerate(load_composer().CLASSES):
+        names_by_class[cls] = []
+        for size in sizes:
+            name = f"polished_{cls}_{size}.png"
+            bank.objects[name] = make_object(size, seed=k * 100 + size)
+            names_by_class[cls].append(name)
+    return bank, names_by_class
+
+
+def bench_make_synth(sizes, worker_counts, n_images, runs=5):
+    """Throughput make_synth (ms/imagine, imagini/s) pentru fiecare număr de workeri.
+
+    Pool-ul se creează o singură dată per număr de workeri, în afara timpului măsurat;
+    o rulare de încălzire (care umple și cache-ul de umbre) nu se măsoară, apoi
+    median_ms = mediana pe `runs` rulări a timpului per imagine.
+    """
+    composer = load_composer()
+    bank, names_by_class = build_bank([s for s in sizes if s <= 256])
+    results = {}
+    with tempfile.TemporaryDirectory() as out:
+        for split in ("train", "val"):
+            for sub in ("images", "labels"):
+                os.makedirs(os.path.join(out, split, sub), exist_ok=True)
+        job_config = dict(
+            output_folder=out, seed=0, journal_path=os.path.join(out, "journal.jsonl"),
+            bg_files=sorted(bank.backgrounds), obj_files_by_class=names_by_class,
+            shadow_prob=0.7, object_folder=out,
+            min_spacing=composer.MIN_SPACING, mask_overlap=composer.MASK_OVERLAP,
+        )
+        jobs = [(i, "train") for i in range(n_images)]
+        for workers in worker_counts:
+            with mp.Pool(workers, initializer=composer._init_worker,
+                         initargs=(bank, job_config)) as pool:
+                run = lambda: list(pool.imap_unordered(composer._run_job, jobs, chunksize=4))
+                timing = time_call(run, runs, warmup=1)
+            per_image = {k: round(v / n_images, 4) for k, v in timing.items() if k.endswith("_ms")}
+            results[f"make_synth/workers={workers}"] = {
+                **per_image,  # per imagine
+                "images_per_s": round(n_images * 1000 / timing["median_ms"], 2),
+                "images": n_images,
+                "repeat": runs,
+            }
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Lista etapelor mai lente decât baseline-ul cu peste `threshold`."""
+    regressions = []
+    for key, base in baseline.get("results", {}).items():
+        cur = results.get(key)
+        if cur is None or not base.get("median_ms"):
+            continue
+        ratio = cur["median_ms"] / base["median_ms"]
+        status = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"{key:45s} {base['median_ms']:10.3f} -> {cur['median_ms']:10.3f} ms  x{ratio:.2f}  {status}")
+        if status != "ok":
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the synthetic composition pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--images", type=int, default=64, help="Images per make_synth run")
+    parser.add_argument("--runs", type=int, default=5, help="Timed make_synth runs per worker count")
+    parser.add_argument("--out", help="Write JSON results here")
+    parser.add_argument("--compare", help="Baseline JSON from a previous run")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed slowdown vs baseline (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    random.seed(0)
+    results = bench_stages(args.sizes, args.repeat)
+    results.update(bench_make_synth(args.sizes, args.workers, args.images, args.runs))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "cpu_count": os.cpu_count(),
+            "sizes": args.sizes,
+            "workers": args.workers,
+            "repeat": args.repeat,
+            "runs": args.runs,
+        },
+        "results": results,
+    }
+
+    for key, res in results.items():
+        extra = f"  {res['images_per_s']:8.2f} img/s" if "images_per_s" in res else ""
+        print(f"{key:45s} {res['median_ms']:10.3f} ms{extra}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[Saved] {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} (threshold {args.threshold:.0%}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions")
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Clasificarea în lot a formelor dintr-un run de extragere (un folder de PNG-uri RGBA,
+ex. temp/app1_extract_selector/objects/<run>).
+
+Trăsăturile fiecărui obiect (vezi shape_features.py) se calculează într-un pool de
+procese și se scriu în `<run>/shapes.csv`, un rând per fișier: file, shape,
+mtime_ns, size, sha1, ms (timpul de clasificare) și coloanele FEATURES.
+La o nouă rulare se refac doar fișierele noi sau modificate: dacă mtime/dimensiunea
+coincid rândul se refolosește direct, altfel se compară hash-ul. Forma se
+recalculează vectorizat din trăsături pentru tot tabelul, deci nu rămâne niciodată
+în urma regulilor.
+
+Exemple:
+    python classify_run.py Streamlit/ble_detection_app/pages/temp/app1_extract_selector/objects/<run>
+    python classify_run.py objects3 --rules blocks --workers 8 --force
+"""
+import os
+import csv
+import time
+import hashlib
+import argparse
+import multiprocessing as mp
+
+import cv2
+import numpy as np
+
+from extraction import apply_morph
+from shape_features import FEATURES, feature_matrix, empty_features, mask_features, classify_blocks, classify_outlines
+
+TABLE_NAME = "shapes.csv"
+COLUMNS = ("file", "shape", "mtime_ns", "size", "sha1", "ms") + FEATURES
+RULES = {"outlines": classify_outlines, "blocks": classify_blocks}
+
+
+def table_path(run_dir):
+    return os.path.join(run_dir, TABLE_NAME)
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def object_features(path):
+    """Trăsăturile obiectului dintr-un PNG RGBA (canalul alpha curățat morfologic)."""
+    img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if img is None or img.ndim != 3 or img.shape[2] != 4:
+        raise ValueError(f"Not an RGBA image: {path}")
+    return mask_features(apply_morph(img[:, :, 3]))
+
+
+def _classify(path):
+    start = time.perf_counter()
+    try:
+        features, error = object_features(path), None
+    except Exception as e:
+        features, error = empty_features(), repr(e)
+    sha1 = file_sha1(path)
+    return path, features, sha1, (time.perf_counter() - start) * 1000, error
+
+
+def load_table(run_dir):
+    """Rândurile din shapes.csv ca {file: row}; {} dacă tabelul lipsește sau e invalid."""
+    try:
+        with open(table_path(run_dir), newline="") as f:
+            reader = csv.DictReader(f)
+            if tuple(reader.fieldnames or ()) != COLUMNS:
+                return {}  # altă versiune a trăsăturilor: se reclasifică tot
+            return {row["file"]: row for row in reader}
+    except OSError:
+        return {}
+
+
+def row_features(row):
+    return np.array([float(row[name]) if row[name] != "" else np.nan for name in FEATURES])
+
+
+def write_table(run_dir, rows):
+    path = table_path(run_dir)
+    with open(path + ".tmp", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def classify_run(run_dir, workers=None, rules="outlines", force=False):
+    """Actualizează shapes.csv pentru run_dir și returnează (rows, stats).
+
+    rows e lista rândurilor (dict cu COLUMNS, valori str/număr), sortată după fișier.
+    """
+    files = sorted(f for f in os.listdir(run_dir) if f.lower().endswith(".png"))
+    table = {} if force else load_table(run_dir)
+
+    rows, pending, errors, touched = {}, [], {}, 0
+    for name in files:
+        path = os.path.join(run_dir, name)
+        st = os.stat(path)
+        old = table.get(name)
+        if old is not None and (old["mtime_ns"], old["size"]) != (str(st.st_mtime_ns), str(st.st_size)):
+            # atins, dar poate nu modificat: hash-ul decide
+            if old["sha1"] == file_sha1(path):
+                old = {**old, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+                touched += 1
+            else:
+                old = None
+        if old is None:
+            pending.append(path)
+        else:
+            rows[name] = old
+
+    features = {name: row_features(row) for name, row in rows.items()}
+    if pending:
+        workers = workers or os.cpu_count()
+        if workers > 1 and len(pending) > 1:
+            with mp.Pool(min(workers, len(pending))) as pool:
+                results = list(pool.imap_unordered(_classify, pending, chunksize=8))
+        else:
+            results = [_classify(path) for path in pending]
+
+        for path, f, sha1, ms, error in results:
+            name = os.path.basename(path)
+            st = os.stat(path)
+            if error:
+                errors[name] = error
+            features[name] = f
+            rows[name] = {"file": name, "mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                          "sha1": sha1, "ms": round(ms, 3)}
+
+    names = sorted(rows)
+    shapes = RULES[rules](feature_matrix([features[n] for n in names]))
+    out = []
+    for name, shape in zip(names, shapes):
+        row = {**rows[name], "shape": str(shape)}
+        row.update((k, "" if np.isnan(v) else round(float(v), 6)) for k, v in zip(FEATURES, features[name]))
+        out.append(row)
+
+    if pending or touched or set(table) != set(names) or force:
+        write_table(run_dir, out)
+    stats = {"files": len(names), "classified": len(pending), "reused": len(names) - len(pending),
+             "errors": errors}
+    return out, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch shape classification for an extraction run")
+    parser.add_argument("run_dir", help="Folder with RGBA object PNGs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--rules", choices=list(RULES), default="outlines")
+    parser.add_argument("--force", action="store_true", help="Ignore the existing table")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows, stats = classify_run(args.run_dir, args.workers, args.rules, args.force)
+    for name, error in stats["errors"].items():
+        print(f"⚠️ {name}: {error}")
+    counts = {}
+    for row in rows:
+        counts[row["shape"]] = counts.get(row["shape"], 0) + 1
+    print(f"Shapes: {dict(sorted(counts.items()))}")
+    print(f"✅ {stats['files']} files ({stats['classified']} classified, {stats['reused']} reused) "
+          f"in {time.perf_counter() - start:.2f}s -> {table_path(args.run_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Segmentare multi-culoare HSV într-o singură trecere.
+
+În loc de câte un cv2.inRange per interval de culoare, fiecare pixel primește
+un bitmask de culori (un bit per culoare, pentru că intervalele se suprapun la
+margini, ex. orange/red la H=10) dintr-o tabelă de lookup HSV -> bitmask.
+
+Tabela completă 180x256x256 ar avea ~12 MB și acces aleator prin cache.
+Pragurile de culoare sunt însă puține, așa că tabela se cuantizează exact:
+fiecare canal e împărțit în intervale între pragurile sale (H: ~15, S: 3, V: 3),
+cu câte un cv2.LUT de 256 de valori per canal, iar tabela combinată are sub
+256 de intrări. Totul rămâne în operații uint8 vectorizate ale OpenCV.
+
+Imaginea de etichete rezultată dă:
+  - masca unei culori: (labels & bit) != 0
+  - acoperirea tuturor culorilor: o singură histogramă pe 256 de valori
+"""
+import cv2
+import numpy as np
+
+COLOR_RANGES = {
+    "red": [((0, 100, 100), (10, 255, 255)), ((160, 100, 100), (179, 255, 255))],
+    "green": [((40, 50, 50), (85, 255, 255))],
+    "yellow": [((20, 100, 100), (35, 255, 255))],
+    "pink": [((145, 100, 100), (165, 255, 255))],
+    "light_blue": [((85, 100, 100), (105, 255, 255))],
+    "orange": [((10, 100, 100), (20, 255, 255))],
+    "blue": [((105, 100, 100), (130, 255, 255))]
+}
+
+
+class ColorLUT:
+    """Tabelă HSV -> bitmask de culori, cuantizată exact pe pragurile culorilor.
+
+    Limitele sunt inclusive, ca la cv2.inRange. Maxim 8 culori (un uint8).
+    """
+
+    def __init__(self, color_ranges=COLOR_RANGES):
+        if len(color_ranges) > 8:
+            raise ValueError("At most 8 colors fit in a uint8 label image")
+        self.colors = list(color_ranges)
+        ranges = [(bit, np.array(lo), np.array(hi))
+                  for bit, rs in enumerate(color_ranges.values()) for lo, hi in rs]
+
+        # Intervalele fiecărui canal: valorile dintre două praguri consecutive
+        # aparțin exact acelorași culori
+        edges = []
+        for ch in range(3):
+            cuts = {0}
+            for _, lo, hi in ranges:
+                cuts.update((int(lo[ch]), int(hi[ch]) + 1))
+            edges.append(np.array(sorted(c for c in cuts if c <= 255)))
+        n_bins = [len(e) for e in edges]
+        if n_bins[0] * n_bins[1] * n_bins[2] > 256:
+            raise ValueError("Too many distinct thresholds for a quantized uint8 LUT")
+
+        # cv2.LUT per canal -> indexul intervalului, deja înmulțit cu pasul lui,
+        # ca suma celor trei să fie direct indexul în tabela combinată
+        strides = (n_bins[1] * n_bins[2], n_bins[2], 1)
+        values = np.arange(256)
+        self.channel_luts = [
+            (np.searchsorted(e, values, side="right") - 1).astype(np.uint8) * np.uint8(s)
+            for e, s in zip(edges, strides)
+        ]
+
+        # Tabela combinată: bitmask-ul pentru reprezentantul (pragul de jos) al fiecărui interval
+        combo = np.zeros(256, np.uint8)
+        for i, h in enumerate(edges[0]):
+            for j, s in enumerate(edges[1]):
+                for k, v in enumerate(edges[2]):
+                    px = np.array([h, s, v])
+                    bits = 0
+                    for bit, lo, hi in ranges:
+                        if (lo <= px).all() and (px <= hi).all():
+                            bits |= 1 << bit
+                    combo[i * strides[0] + j * strides[1] + k] = bits
+        self.combo_lut = combo
+
+    def apply(self, hsv_img):
+        """Imaginea de etichete uint8 (bitmask de culori per pixel)."""
+        h, s, v = cv2.split(hsv_img)
+        idx = cv2.add(cv2.LUT(h, self.channel_luts[0]), cv2.LUT(s, self.channel_luts[1]))
+        idx = cv2.add(idx, cv2.LUT(v, self.channel_luts[2]))
+        return cv2.LUT(idx, self.combo_lut)
+
+
+_LUT_CACHE = {}
+
+
+def get_lut(color_ranges=COLOR_RANGES):
+    """ColorLUT memoizat per set de culori."""
+    key = tuple((name, tuple((tuple(lo), tuple(hi)) for lo, hi in ranges))
+                for name, ranges in color_ranges.items())
+    lut = _LUT_CACHE.get(key)
+    if lut is None:
+        lut = _LUT_CACHE[key] = ColorLUT(color_ranges)
+    return lut
+
+
+def segment_colors(img, color_ranges=COLOR_RANGES, hsv_img=None):
+    """Imaginea de etichete uint8 (bitmask de culori per pixel) pentru o imagine BGR."""
+    if hsv_img is None:
+        hsv_img = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    return get_lut(color_ranges).apply(hsv_img)
+
+
+def color_mask(labels, color, color_ranges=COLOR_RANGES):
+    """Masca uint8 (0/255) a unei culori din imaginea de etichete."""
+    bit = 1 << list(color_ranges).index(color)
+    return cv2.compare(cv2.bitwise_and(labels, bit), 0, cv2.CMP_GT)
+
+
+def color_coverage(labels, color_ranges=COLOR_RANGES):
+    """Numărul de pixeli per culoare, dintr-o singură histogramă a imaginii de etichete."""
+    counts = cv2.calcHist([labels], [0], None, [256], [0, 256]).ravel().astype(np.int64)
+    values = np.arange(256)
+    return {
+        name: int(counts[(values & (1 << bit)) != 0].sum())
+        for bit, name in enumerate(color_ranges)
+    }
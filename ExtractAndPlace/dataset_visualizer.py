@@ -4,8 +4,11 @@ Run with:
     streamlit run dataset_visualizer.py
 """
 import os
+import numpy as np
 from PIL import Image, ImageDraw
 import streamlit as st
+from label_index import index_path, load_label_index, labels_for, read_label_txt
+from thumbnails import thumbnail_grid
 
 # --- Configuration ---
 st.set_page_config(page_title="Dataset Visualizer", layout="wide")
@@ -27,32 +30,50 @@ if not images:
     st.warning(f"No images in {img_dir}")
     st.stop()
 
+# --- Columnar label index (<labels>.npz), if present and up to date ---
+# cheia include și mtime-ul folderului: load_label_index respinge un index mai vechi decât el
+@st.cache_data
+def cached_label_index(labels_dir, index_mtime, dir_mtime):
+    return load_label_index(labels_dir)
+
+try:
+    label_index = cached_label_index(lbl_dir, os.path.getmtime(index_path(lbl_dir)),
+                                     os.path.getmtime(lbl_dir))
+except OSError:
+    label_index = None
+
+if label_index is not None:
+    counts = np.bincount(label_index["cls"])
+    st.sidebar.write(f"Split: {len(label_index['names'])} images, {len(label_index['cls'])} labels")
+    st.sidebar.write({f"class {i}": int(n) for i, n in enumerate(counts)})
+
 # --- Sidebar navigation ---
-view_mode = st.sidebar.radio("View mode", ["Single", "Gallery"])
-
-if view_mode == "Single":
-    # Navigation arrows and index
-    index = st.sidebar.number_input("Image index", min_value=0, max_value=len(images)-1, value=0, step=1)
-    prev_col, next_col = st.sidebar.columns(2)
-    if prev_col.button("⬅️ Previous"):
-        index = max(index - 1, 0)
-    if next_col.button("Next ➡️"):
-        index = min(index + 1, len(images)-1)
-    selected = images[index]
-    st.sidebar.write(f"{index + 1} / {len(images)}")
-else:
-    # Gallery view: thumbnails
-    cols = st.columns(4)
-    selected = None
-    for i, img_name in enumerate(images):
-        col = cols[i % 4]
-        with col:
-            thumbnail = Image.open(os.path.join(img_dir, img_name)).resize((160, 140))
-            if st.button(img_name, key=f"btn_{i}"):
-                selected = img_name
-                view_mode = "Single"
-    if selected is None:
-        selected = images[0]
+if "image_index" not in st.session_state or st.session_state.image_index >= len(images):
+    st.session_state.image_index = 0
+
+def step(delta):
+    st.session_state.image_index = min(max(st.session_state.image_index + delta, 0), len(images) - 1)
+
+def open_image(i):
+    st.session_state.image_index = i
+    st.session_state.view_mode = "Single"
+
+view_mode = st.sidebar.radio("View mode", ["Single", "Gallery"], key="view_mode")
+
+if view_mode == "Gallery":
+    # Paginated thumbnails from the on-disk cache (see thumbnails.py)
+    per_page = st.sidebar.select_slider("Thumbnails per page", [12, 24, 48, 96], value=24)
+    thumbnail_grid([os.path.join(img_dir, f) for f in images], captions=images,
+                   key=f"gallery_{split}", per_page=per_page, on_select=open_image)
+    st.stop()
+
+# Navigation arrows and index
+st.sidebar.number_input("Image index", min_value=0, max_value=len(images)-1, step=1, key="image_index")
+prev_col, next_col = st.sidebar.columns(2)
+prev_col.button("⬅️ Previous", on_click=step, args=(-1,))
+next_col.button("Next ➡️", on_click=step, args=(1,))
+selected = images[st.session_state.image_index]
+st.sidebar.write(f"{st.session_state.image_index + 1} / {len(images)}")
 
 # --- Load selected image ---
 img_path = os.path.join(img_dir, selected)
@@ -63,25 +84,26 @@ image = Image.open(img_path).convert("RGB")
 w, h = image.size
 
 draw = ImageDraw.Draw(image)
-if os.path.exists(lbl_path):
-    with open(lbl_path) as f:
-        for line in f:
-            parts = line.strip().split()
-            if len(parts) != 5:
-                continue
-            cls_id, x_c, y_c, bw, bh = map(float, parts)
-            x_c, y_c, bw, bh = x_c * w, y_c * h, bw * w, bh * h
-            x0, y0 = x_c - bw/2, y_c - bh/2
-            x1, y1 = x_c + bw/2, y_c + bh/2
-            draw.rectangle([x0, y0, x1, y1], outline="red", width=2)
-            draw.text((x0, y0 - 10), str(int(cls_id)), fill="red")
+stem = selected.rsplit('.', 1)[0]
+if label_index is not None and stem in label_index["names"]:
+    boxes = labels_for(label_index, stem)
+elif os.path.exists(lbl_path):
+    boxes = read_label_txt(lbl_path)
 else:
+    boxes = None
     st.warning("Missing label file for selected image.")
 
+for cls_id, x_c, y_c, bw, bh in (boxes if boxes is not None else []):
+    x_c, y_c, bw, bh = x_c * w, y_c * h, bw * w, bh * h
+    x0, y0 = x_c - bw/2, y_c - bh/2
+    x1, y1 = x_c + bw/2, y_c + bh/2
+    draw.rectangle([x0, y0, x1, y1], outline="red", width=2)
+    draw.text((x0, y0 - 10), str(int(cls_id)), fill="red")
+
 # --- Display ---
 st.image(image, caption=f"{split}/{selected}", use_container_width=True)
 
 # --- Info ---
 st.sidebar.markdown("---")
 st.sidebar.write(f"Image size: {w}×{h}")
-st.sidebar.write(f"Labels found: {os.path.exists(lbl_path)}")
+st.sidebar.write(f"Labels found: {boxes is not None}")
@@ -0,0 +1,119 @@
+"""
+Extragere headless, în paralel, a obiectelor dintr-un folder de capturi.
+
+Înlocuiește bucla interactivă (apăsat 's' per imagine) când pragurile sunt deja
+stabilite: aceleași decupaje RGBA, plus un manifest JSON cu statisticile
+fiecărui contur.
+
+Exemple:
+    python extract.py rawObj/objPiCamera --config threshold_config.json --workers 4
+    python extract.py rawObj/objPiCamera --color red --color blue -o objects_red_blue
+"""
+import os
+import json
+import time
+import argparse
+import multiprocessing as mp
+
+import cv2
+
+from color_segmentation import COLOR_RANGES
+from extraction import (MIN_AREA, load_hsv_config, hsv_mask, preset_mask,
+                        apply_morph, extract_crops, extract_component_crops, list_images)
+
+# contours: contururi exterioare (alpha = masca din bbox, aria poligonului)
+# components: componente conexe (alpha = doar pixelii obiectului, aria în pixeli)
+EXTRACTORS = {"contours": extract_crops, "components": extract_component_crops}
+
+
+def process_image(path, settings):
+    """Extrage obiectele unei imagini și le scrie ca PNG; returnează intrările de manifest."""
+    img = cv2.imread(path)
+    if img is None:
+        return path, [], f"Could not read {path}"
+
+    if settings["colors"]:
+        mask = preset_mask(img, settings["colors"])
+    else:
+        mask = hsv_mask(cv2.cvtColor(img, cv2.COLOR_BGR2HSV), settings["hsv"])
+    mask = apply_morph(mask)
+
+    base_name = os.path.splitext(os.path.basename(path))[0]
+    entries = []
+    extract = EXTRACTORS[settings["mode"]]
+    for k, (rgba, stats) in enumerate(extract(img, mask, settings["min_area"])):
+        out_name = f"{base_name}_obj_{k}.png"
+        cv2.imwrite(os.path.join(settings["output"], out_name), rgba)
+        entries.append({"file": out_name, "source": os.path.basename(path), "index": k, **stats})
+    return path, entries, None
+
+
+def _process(args):
+    path, settings = args
+    try:
+        return process_image(path, settings)
+    except Exception as e:
+        return path, [], repr(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless batch object extraction")
+    parser.add_argument("input", help="Folder with raw captures")
+    parser.add_argument("-o", "--output", default="objects", help="Output folder for RGBA crops")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--config", default="threshold_config.json",
+                        help="Saved HSV thresholds (threshold_config.json)")
+    source.add_argument("--color", action="append", choices=list(COLOR_RANGES),
+                        help="Color preset(s) instead of the HSV config; repeatable")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--min-area", type=float, default=MIN_AREA)
+    parser.add_argument("--mode", choices=list(EXTRACTORS), default="contours",
+                        help="Object extraction: external contours or connected components")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    settings = {
+        "output": args.output,
+        "colors": args.color or [],
+        "hsv": None if args.color else load_hsv_config(args.config),
+        "min_area": args.min_area,
+        "mode": args.mode,
+    }
+    paths = list_images(args.input)
+    if not paths:
+        print(f"⚠️ No valid images found in {args.input}")
+        return
+
+    start = time.perf_counter()
+    objects, errors = [], []
+    with mp.Pool(args.workers) as pool:
+        for i, (path, entries, error) in enumerate(
+                pool.imap_unordered(_process, [(p, settings) for p in paths]), 1):
+            if error:
+                errors.append({"source": os.path.basename(path), "error": error})
+                print(f"⚠️ {error}")
+            objects.extend(entries)
+            print(f"[{i}/{len(paths)}] {os.path.basename(path)}: {len(entries)} objects")
+    elapsed = time.perf_counter() - start
+
+    objects.sort(key=lambda e: (e["source"], e["index"]))
+    manifest = {
+        "input": os.path.abspath(args.input),
+        "colors": settings["colors"],
+        "hsv": settings["hsv"],
+        "min_area": args.min_area,
+        "mode": args.mode,
+        "images": len(paths),
+        "elapsed_s": round(elapsed, 3),
+        "objects": objects,
+        "errors": errors,
+    }
+    manifest_path = os.path.join(args.output, "manifest.json")
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    print(f"✅ {len(objects)} objects from {len(paths)} images in {elapsed:.1f}s -> {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import cv2
 import numpy as np
 import os
 import json
+from extraction import extract_components
+from shape_features import mask_features, feature_matrix, classify_blocks
 
 # --- Configurare ---
 IMAGE_FOLDER = "ExtractAndPlace/rawObj/objPiCamera"
@@ -24,35 +26,6 @@ if os.path.exists(CONFIG_FILE):
 else:
     hsv = {"lh": 0, "ls": 0, "lv": 0, "uh": 179, "us": 51, "uv": 241}
 
-def classify_shape(cnt, w, h):
-    approx = cv2.approxPolyDP(cnt, 0.04 * cv2.arcLength(cnt, True), True)
-    v = len(approx)
-
-    if v == 3:
-        return "triangle"
-    elif v == 4:
-        # folosește bounding box rotit pentru a evita probleme la pătrate înclinate
-        rect = cv2.minAreaRect(cnt)
-        box = cv2.boxPoints(rect)
-        box = np.int0(box)
-        side_lengths = [np.linalg.norm(box[i] - box[(i+1)%4]) for i in range(4)]
-        side_lengths.sort()
-        short, long_ = side_lengths[0], side_lengths[-1]
-        aspect_ratio = short / long_
-        if aspect_ratio >= 0.70:
-            return "cube"
-        else:
-            return "rectangle"
-    elif v == 5:
-        return "arch"
-    else:
-        if not cv2.isContourConvex(approx):
-            return "arch"
-        else:
-            ratio = cv2.contourArea(cnt) / (w * h)
-            return "half-circle" if ratio < 0.7 else "cylinder"
-
-
 def extract_objects(image_path, idx):
     img = cv2.imread(image_path)
     #img = cv2.resize(img, (640, 640))
@@ -67,17 +40,13 @@ def extract_objects(image_path, idx):
     mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
     mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
 
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    for i, cnt in enumerate(contours):
-        if cv2.contourArea(cnt) < 300:
-            continue
-        x, y, w, h = cv2.boundingRect(cnt)
-        obj = img[y:y+h, x:x+w]
-        alpha = mask[y:y+h, x:x+w]
-
-        shape = classify_shape(cnt, w, h)
+    # componentele conexe (aria, bbox, centroid) într-o singură trecere, filtrate după arie
+    components = extract_components(mask, min_area=300)
+    views = [components.view(img, obj) for obj in components.objects]
+    # trăsăturile tuturor obiectelor, clasificate dintr-o dată
+    shapes = classify_blocks(feature_matrix([mask_features(alpha) for _, alpha in views]))
 
+    for i, ((obj, alpha), shape) in enumerate(zip(views, shapes)):
         b, g, r = cv2.split(obj)
         rgba = cv2.merge((b, g, r, alpha))
         filename = f"{shape}_{idx}_{i}.png"
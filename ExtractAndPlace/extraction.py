@@ -0,0 +1,242 @@
+"""
+Funcții comune de extragere a obiectelor dintr-o captură: mască HSV (prag
+salvat în threshold_config.json sau preset de culoare), curățare morfologică
+și decupare RGBA a contururilor.
+"""
+import os
+import json
+import functools
+import threading
+import cv2
+import numpy as np
+
+from color_segmentation import segment_colors, color_mask
+
+DEFAULT_HSV = {"lh": 0, "ls": 0, "lv": 0, "uh": 179, "us": 255, "uv": 255}
+MIN_AREA = 300
+VALID_EXT = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def load_hsv_config(config_file):
+    """Pragurile HSV din fișier, sau DEFAULT_HSV dacă fișierul lipsește / e invalid."""
+    if os.path.exists(config_file):
+        try:
+            with open(config_file) as f:
+                return {**DEFAULT_HSV, **json.load(f)}
+        except (OSError, ValueError):
+            pass
+    return dict(DEFAULT_HSV)
+
+
+def hsv_mask(hsv_img, hsv):
+    lower = np.array([hsv["lh"], hsv["ls"], hsv["lv"]])
+    upper = np.array([hsv["uh"], hsv["us"], hsv["uv"]])
+    return cv2.inRange(hsv_img, lower, upper)
+
+
+def preset_mask(img, colors, hsv_img=None):
+    """Reuniunea măștilor preset-urilor de culoare (vezi COLOR_RANGES)."""
+    labels = segment_colors(img, hsv_img=hsv_img)
+    mask = np.zeros(img.shape[:2], np.uint8)
+    for color in colors:
+        mask |= color_mask(labels, color)
+    return mask
+
+
+def preview_levels(shape, max_side=1280):
+    """Câte niveluri pyrDown (fiecare /2) aduc latura maximă sub max_side."""
+    side, levels = max(shape[:2]), 0
+    while side > max_side:
+        side = (side + 1) // 2
+        levels += 1
+    return levels
+
+
+def pyramid_down(img, levels):
+    for _ in range(levels):
+        img = cv2.pyrDown(img)
+    return img
+
+
+def scaled_ksize(ksize, levels):
+    """Kernelul morfologic echivalent pe o imagine micșorată de 2**levels ori (impar).
+
+    Un kernel de bază >= 3 rămâne >= 3: cu 1 morfologia n-ar mai face nimic și
+    previzualizarea n-ar mai semăna cu rezultatul la rezoluție completă.
+    """
+    k = int(round(ksize / 2 ** levels)) | 1
+    return max(k, 3) if ksize >= 3 else max(k, 1)
+
+
+class MaskCleanup:
+    """Curățarea unei măști binare: OPEN + CLOSE, opțional dilate, umplerea contururilor.
+
+    Kernelul se construiește o singură dată. Operațiile rulează doar pe dreptunghiul
+    care cuprinde pixelii nenuli (plus o margine în care morfologia poate modifica
+    rezultatul), direct în masca de ieșire prin dst=; bufferul intermediar e
+    refolosit între apeluri (câte unul per thread). Rezultatul e identic cu
+    aceleași operații rulate pe toată imaginea.
+
+        fill          contururile exterioare sunt desenate pline (găurile dispar)
+        keep_largest  se păstrează doar cel mai mare contur (implică fill)
+    """
+
+    def __init__(self, ksize=5, dilate=0, fill=False, keep_largest=False, shape=cv2.MORPH_RECT):
+        self.ksize = ksize
+        self.dilate = dilate
+        self.fill = fill or keep_largest
+        self.keep_largest = keep_largest
+        self.kernel = cv2.getStructuringElement(shape, (ksize, ksize))
+        # raza kernelului x (CLOSE + iterațiile de dilate), +1 pentru siguranță
+        self.margin = (ksize // 2) * (2 + dilate) + 1
+        self._local = threading.local()
+
+    def _scratch(self, h, w):
+        buf = getattr(self._local, "buf", None)
+        if buf is None or buf.shape[0] < h or buf.shape[1] < w:
+            buf = self._local.buf = np.empty((h, w), np.uint8)
+        return buf[:h, :w]
+
+    def roi(self, mask):
+        """Slice-urile (rânduri, coloane) de procesat, sau None pentru o mască goală."""
+        x, y, w, h = cv2.boundingRect(mask)
+        if w == 0 or h == 0:
+            return None
+        m = self.margin
+        return (slice(max(y - m, 0), min(y + h + m, mask.shape[0])),
+                slice(max(x - m, 0), min(x + w + m, mask.shape[1])))
+
+    def __call__(self, mask, out=None):
+        return self._run(mask, out, want_contours=False)[0]
+
+    def apply(self, mask, out=None):
+        """(mască curățată, contururile ei exterioare în coordonatele imaginii)."""
+        return self._run(mask, out, want_contours=True)
+
+    def _run(self, mask, out, want_contours):
+        if out is None:
+            out = np.zeros(mask.shape[:2], np.uint8)
+        else:
+            out[:] = 0
+        roi = self.roi(mask)
+        if roi is None:
+            return out, []
+
+        rows, cols = roi
+        dst = out[rows, cols]
+        tmp = self._scratch(*dst.shape)
+        cv2.morphologyEx(mask[rows, cols], cv2.MORPH_OPEN, self.kernel, dst=tmp)
+        cv2.morphologyEx(tmp, cv2.MORPH_CLOSE, self.kernel, dst=dst)
+        if self.dilate:
+            cv2.dilate(dst, self.kernel, dst=dst, iterations=self.dilate)
+
+        if not (self.fill or want_contours):
+            return out, []
+        contours, _ = cv2.findContours(dst, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if self.keep_largest and contours:
+            contours = [max(contours, key=cv2.contourArea)]
+        if self.fill:
+            dst[:] = 0
+            cv2.drawContours(dst, contours, -1, 255, cv2.FILLED)
+        offset = np.array([cols.start, rows.start], np.int32)
+        return out, [c + offset for c in contours]
+
+
+@functools.lru_cache(maxsize=None)
+def mask_cleanup(ksize=5, dilate=0, fill=False, keep_largest=False):
+    """MaskCleanup partajat pentru o configurație (kernelul se construiește o singură dată)."""
+    return MaskCleanup(ksize, dilate, fill, keep_largest)
+
+
+def apply_morph(mask, ksize=5):
+    return mask_cleanup(ksize)(mask)
+
+
+def extract_crops(img, mask, min_area=MIN_AREA):
+    """Decupaje RGBA pentru contururile exterioare cu aria >= min_area.
+
+    Returnează listă de (rgba, stats); stats e serializabil JSON.
+    """
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    crops = []
+    for cnt in contours:
+        area = cv2.contourArea(cnt)
+        if area < min_area:
+            continue
+        x, y, w, h = cv2.boundingRect(cnt)
+        m = cv2.moments(cnt)
+        cx, cy = (m["m10"] / m["m00"], m["m01"] / m["m00"]) if m["m00"] else (x + w / 2, y + h / 2)
+        rgba = cv2.cvtColor(img[y:y+h, x:x+w], cv2.COLOR_BGR2BGRA)
+        rgba[:, :, 3] = mask[y:y+h, x:x+w]
+        crops.append((rgba, {
+            "area": float(area),
+            "perimeter": float(cv2.arcLength(cnt, True)),
+            "bbox": [int(x), int(y), int(w), int(h)],
+            "centroid": [round(cx, 2), round(cy, 2)],
+        }))
+    return crops
+
+
+# BBDT (Grana) e de ~2.5x mai rapid decât algoritmul implicit și are variantă paralelă
+CCL_ALGORITHM = getattr(cv2, "CCL_GRANA", getattr(cv2, "CCL_DEFAULT", -1))
+
+
+class Components:
+    """Rezultatul extract_components: tabelul obiectelor și etichetele din ROI.
+
+    `objects` e lista obiectelor (dict serializabil JSON: label, area, bbox
+    [x, y, w, h], centroid [cx, cy]) în coordonatele imaginii; `labels` acoperă
+    doar dreptunghiul cu pixeli nenuli, care începe la `origin` (x, y).
+    """
+
+    def __init__(self, labels, origin, objects):
+        self.labels = labels
+        self.origin = origin
+        self.objects = objects
+
+    def __len__(self):
+        return len(self.objects)
+
+    def view(self, img, obj):
+        """(bgr, alpha): bgr e un view în img, alpha conține doar pixelii componentei
+        (nu și alte obiecte care intră în același bbox)."""
+        x, y, w, h = obj["bbox"]
+        lx, ly = x - self.origin[0], y - self.origin[1]
+        alpha = (self.labels[ly:ly+h, lx:lx+w] == obj["label"]).view(np.uint8) * np.uint8(255)
+        return img[y:y+h, x:x+w], alpha
+
+    def rgba(self, img, obj):
+        bgr, alpha = self.view(img, obj)
+        return cv2.merge((*cv2.split(bgr), alpha))
+
+
+def extract_components(mask, min_area=MIN_AREA, connectivity=8):
+    """Obiectele din mască, cu aria (în pixeli) >= min_area, într-o singură trecere
+    connectedComponentsWithStats pe dreptunghiul care conține pixeli nenuli."""
+    x0, y0, w, h = cv2.boundingRect(mask)
+    if w == 0 or h == 0:
+        return Components(np.zeros((0, 0), np.int32), (0, 0), [])
+    _, labels, stats, centroids = cv2.connectedComponentsWithStatsWithAlgorithm(
+        mask[y0:y0+h, x0:x0+w], connectivity, cv2.CV_32S, CCL_ALGORITHM)
+
+    keep = np.flatnonzero(stats[1:, cv2.CC_STAT_AREA] >= min_area) + 1  # 0 = fundal
+    bbox = stats[keep, :4] + np.array([x0, y0, 0, 0], np.int32)
+    centroid = np.round(centroids[keep] + (x0, y0), 2)
+    objects = [{
+        "label": int(i),
+        "area": int(stats[i, cv2.CC_STAT_AREA]),
+        "bbox": b.tolist(),
+        "centroid": c.tolist(),
+    } for i, b, c in zip(keep, bbox, centroid)]
+    return Components(labels, (x0, y0), objects)
+
+
+def extract_component_crops(img, mask, min_area=MIN_AREA):
+    """Ca extract_crops, dar pe componente conexe: listă de (rgba, stats)."""
+    components = extract_components(mask, min_area)
+    return [(components.rgba(img, obj), obj) for obj in components.objects]
+
+
+def list_images(folder):
+    return [os.path.join(folder, f) for f in sorted(os.listdir(folder))
+            if f.lower().endswith(VALID_EXT)]
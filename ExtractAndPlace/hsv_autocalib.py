@@ -0,0 +1,181 @@
+"""
+Calibrare automată a pragurilor HSV dintr-o captură de referință a mesei goale.
+
+Pixelii obiectelor se obțin din capturile cu obiecte, prin diferența față de
+referință (plus curățare morfologică), iar pixelii de fundal din referință.
+Din ambele seturi se construiește câte o histogramă HSV 3D (un singur
+np.bincount pe indexul combinat al binurilor), apoi se caută cutia
+[lh, uh] x [ls, us] x [lv, uv] care maximizează TPR - FPR:
+pe rând pentru fiecare canal, cu celelalte două fixate, histogramele se
+marginalizează la 1D și intervalul optim se găsește exact (subșir de sumă
+maximă pe ponderile pos/P - neg/N), până nu se mai schimbă nimic.
+
+Rezultatul are formatul threshold_config.json (lh, ls, lv, uh, us, uv).
+
+Exemplu:
+    python hsv_autocalib.py --background rawObj/empty.jpg rawObj/objPiCamera/*.jpg -o threshold_config.json
+"""
+import os
+import json
+import argparse
+
+import cv2
+import numpy as np
+
+from extraction import MaskCleanup, preview_levels, pyramid_down
+
+HSV_MAX = (179, 255, 255)
+BIN_WIDTH = (4, 4, 4)
+BINS = tuple(m // w + 1 for m, w in zip(HSV_MAX, BIN_WIDTH))  # (45, 64, 64)
+DIFF_THRESH = 40
+MAX_MARGIN = (3, 8, 8)  # binuri; marginea maximă adăugată peste extinderea obiectului (H, S, V)
+MAX_SIDE = 1280
+OBJECT_CLEANUP = MaskCleanup(5)
+
+
+def hsv_histogram(hsv, mask=None):
+    """Histograma 3D (BINS) a pixelilor HSV, opțional doar unde mask > 0."""
+    pixels = hsv.reshape(-1, 3) if mask is None else hsv[mask > 0]
+    q = pixels // np.array(BIN_WIDTH, np.uint8)
+    idx = (q[:, 0].astype(np.int32) * BINS[1] + q[:, 1]) * BINS[2] + q[:, 2]
+    return np.bincount(idx, minlength=BINS[0] * BINS[1] * BINS[2]).reshape(BINS)
+
+
+def object_mask(img, background, diff_thresh=DIFF_THRESH):
+    """Pixelii care diferă de referință (max pe canale > diff_thresh), curățați morfologic."""
+    diff = cv2.absdiff(img, background).max(axis=2)
+    return OBJECT_CLEANUP((diff > diff_thresh).view(np.uint8) * np.uint8(255))
+
+
+def _best_interval(weights):
+    """(start, stop) inclusiv al subșirului de sumă maximă (Kadane)."""
+    best, best_range = -np.inf, (0, len(weights) - 1)
+    run, start = 0.0, 0
+    for i, w in enumerate(weights):
+        if run <= 0:
+            run, start = w, i
+        else:
+            run += w
+        if run > best:
+            best, best_range = run, (start, i)
+    return best_range
+
+
+def _box_sum(hist, box):
+    return hist[tuple(slice(lo, hi + 1) for lo, hi in box)].sum()
+
+
+def fit_bounds(pos_hist, neg_hist, max_iter=10):
+    """Cutia de binuri [(lo, hi)] * 3 care maximizează TPR - FPR, plus (tpr, fpr)."""
+    P, N = max(pos_hist.sum(), 1), max(neg_hist.sum(), 1)
+    box = [(0, b - 1) for b in BINS]
+    for _ in range(max_iter):
+        changed = False
+        for c in range(3):
+            sel = tuple(slice(None) if k == c else slice(lo, hi + 1) for k, (lo, hi) in enumerate(box))
+            others = tuple(k for k in range(3) if k != c)
+            weights = pos_hist[sel].sum(axis=others) / P - neg_hist[sel].sum(axis=others) / N
+            new = _best_interval(weights)
+            if new != box[c]:
+                box[c], changed = new, True
+        if not changed:
+            break
+
+    # La egalitate (binuri fără pixeli de fundal) cutia se lărgește, nu se strânge:
+    # fiecare capăt trece la jumătatea distanței dintre extinderea obiectului și cel
+    # mai apropiat bin cu fundal (cel mult MAX_MARGIN binuri), ca pragurile să aibă
+    # margine la o schimbare de lumină. Binurile adăugate nu au fundal, deci FPR
+    # rămâne același iar TPR nu scade.
+    for c in range(3):
+        box[c] = _margin_interval(pos_hist, neg_hist, box, c)
+    return box, (_box_sum(pos_hist, box) / P, _box_sum(neg_hist, box) / N)
+
+
+def _margin_interval(pos_hist, neg_hist, box, c):
+    """Intervalul pe canalul c: extinderea obiectului plus jumătate din golul până la fundal."""
+    margin = MAX_MARGIN[c]
+    others = tuple(k for k in range(3) if k != c)
+    sel = tuple(slice(None) if k == c else slice(lo, hi + 1) for k, (lo, hi) in enumerate(box))
+    pos = pos_hist[sel].sum(axis=others)
+    neg = neg_hist[sel].sum(axis=others)
+    lo, hi = box[c]
+    inside = np.flatnonzero(pos[lo:hi + 1])
+    if not inside.size:
+        return lo, hi
+    p_lo, p_hi = lo + int(inside[0]), lo + int(inside[-1])
+    below = np.flatnonzero(neg[:p_lo])
+    above = p_hi + 1 + np.flatnonzero(neg[p_hi + 1:])
+    # binurile libere sunt below[-1]+1 .. p_lo-1 și p_hi+1 .. above[0]-1
+    new_lo = (int(below[-1]) + 1 + p_lo) // 2 if below.size else 0
+    new_hi = (p_hi + int(above[0])) // 2 if above.size else len(pos) - 1
+    return max(new_lo, p_lo - margin), min(new_hi, p_hi + margin)
+
+
+def box_to_config(box):
+    lo = [b_lo * w for (b_lo, _), w in zip(box, BIN_WIDTH)]
+    hi = [min((b_hi + 1) * w - 1, m) for (_, b_hi), w, m in zip(box, BIN_WIDTH, HSV_MAX)]
+    return {"lh": lo[0], "ls": lo[1], "lv": lo[2], "uh": hi[0], "us": hi[1], "uv": hi[2]}
+
+
+def _load_small(path):
+    img = cv2.imread(path)
+    if img is None:
+        raise ValueError(f"Could not read {path}")
+    return pyramid_down(img, preview_levels(img.shape, MAX_SIDE))
+
+
+def reference_histogram(background_path):
+    """Captura mesei goale (micșorată) și histograma ei HSV (pixelii de fundal)."""
+    background = _load_small(background_path)
+    return background, hsv_histogram(cv2.cvtColor(background, cv2.COLOR_BGR2HSV))
+
+
+def capture_histogram(path, background, diff_thresh=DIFF_THRESH):
+    """Histograma HSV a pixelilor de obiect dintr-o captură, față de referința background."""
+    img = _load_small(path)
+    if img.shape != background.shape:
+        img = cv2.resize(img, (background.shape[1], background.shape[0]))
+    mask = object_mask(img, background, diff_thresh)
+    return hsv_histogram(cv2.cvtColor(img, cv2.COLOR_BGR2HSV), mask)
+
+
+def fit_histograms(pos_hist, neg_hist):
+    """Pragurile (format threshold_config) și statisticile din histogramele obiect / fundal."""
+    if not pos_hist.any():
+        raise ValueError("No object pixels found; check the background frame or lower diff_thresh")
+    box, (tpr, fpr) = fit_bounds(pos_hist, neg_hist)
+    stats = {"tpr": round(float(tpr), 4), "fpr": round(float(fpr), 4),
+             "object_pixels": int(pos_hist.sum()), "background_pixels": int(neg_hist.sum())}
+    return box_to_config(box), stats
+
+
+def calibrate(background_path, capture_paths, diff_thresh=DIFF_THRESH):
+    """Pragurile propuse (format threshold_config) și statisticile potrivirii."""
+    background, neg_hist = reference_histogram(background_path)
+    pos_hist = np.zeros(BINS, np.int64)
+    for path in capture_paths:
+        pos_hist += capture_histogram(path, background, diff_thresh)
+    return fit_histograms(pos_hist, neg_hist)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate HSV thresholds from a background reference frame")
+    parser.add_argument("captures", nargs="+", help="Captures with objects on the table")
+    parser.add_argument("--background", required=True, help="Capture of the empty table")
+    parser.add_argument("-o", "--output", default="threshold_config.json")
+    parser.add_argument("--diff-thresh", type=int, default=DIFF_THRESH,
+                        help="Min per-channel difference from the background for object pixels")
+    args = parser.parse_args()
+
+    config, stats = calibrate(args.background, args.captures, args.diff_thresh)
+    print(f"HSV bounds: {config}")
+    print(f"TPR {stats['tpr']:.3f}, FPR {stats['fpr']:.3f} "
+          f"({stats['object_pixels']} object / {stats['background_pixels']} background pixels)")
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(config, f, indent=2)
+    print(f"[Saved] {args.output}")
+
+
+if __name__ == "__main__":
+    main()
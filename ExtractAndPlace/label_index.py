@@ -0,0 +1,100 @@
+"""
+Index columnar pentru etichetele YOLO ale unui split.
+
+Pe lângă fișierele .txt per imagine, fiecare folder de etichete poate avea un
+index `<labels_dir>.npz` (ex. dataset/train/labels -> dataset/train/labels.npz)
+cu toate etichetele într-un singur fișier:
+    names     numele fișierelor fără extensie (un rând per imagine, inclusiv cele fără etichete)
+    image_id  int32, indexul în `names` al fiecărei etichete
+    cls       int16
+    cx, cy, w, h  float32, normalizate ca în .txt
+
+Statisticile pe zeci de mii de etichete devin operații numpy (bincount etc.)
+în loc de mii de open(). Pentru un dataset existent, indexul se poate construi cu:
+    python label_index.py dataset/train/labels dataset/val/labels
+"""
+import os
+import sys
+import numpy as np
+
+COLUMNS = ("cx", "cy", "w", "h")
+
+
+def index_path(labels_dir):
+    return os.path.normpath(labels_dir) + ".npz"
+
+
+def read_label_txt(path):
+    """Rândurile (cls, cx, cy, w, h) dintr-un fișier YOLO .txt; liniile invalide sunt ignorate."""
+    rows = []
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) != 5:
+                continue
+            rows.append((int(float(parts[0])), *map(float, parts[1:])))
+    return rows
+
+
+def write_label_index(labels_dir, names, labels_by_name):
+    """Scrie indexul atomic. labels_by_name: {name: [(cls, cx, cy, w, h), ...]}."""
+    image_id, rows = [], []
+    for i, name in enumerate(names):
+        for row in labels_by_name.get(name, ()):
+            image_id.append(i)
+            rows.append(row)
+    table = np.asarray(rows, dtype=np.float64).reshape(-1, 5)
+
+    path = index_path(labels_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            names=np.asarray(names, dtype=str),
+            image_id=np.asarray(image_id, dtype=np.int32),
+            cls=table[:, 0].astype(np.int16),
+            **{col: table[:, k + 1].astype(np.float32) for k, col in enumerate(COLUMNS)},
+        )
+    os.replace(tmp_path, path)
+    return path
+
+
+def build_label_index(labels_dir):
+    """Construiește indexul dintr-un folder de .txt existent (o singură trecere pe disc)."""
+    names = sorted(os.path.splitext(f)[0] for f in os.listdir(labels_dir) if f.endswith(".txt"))
+    labels = {name: read_label_txt(os.path.join(labels_dir, name + ".txt")) for name in names}
+    return write_label_index(labels_dir, names, labels)
+
+
+def load_label_index(labels_dir):
+    """Indexul ca dict de array-uri, sau None dacă lipsește ori e mai vechi decât folderul."""
+    path = index_path(labels_dir)
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(labels_dir):
+            return None  # fișiere adăugate/șterse după scrierea indexului
+        with np.load(path) as data:
+            return {key: data[key] for key in data.files}
+    except (OSError, ValueError):
+        return None
+
+
+def drop_label_index(labels_dir):
+    """Șterge indexul după ce un .txt a fost modificat pe loc (mtime-ul folderului nu se schimbă)."""
+    try:
+        os.remove(index_path(labels_dir))
+    except FileNotFoundError:
+        pass
+
+
+def labels_for(index, name):
+    """Etichetele unei imagini din index, ca array (n, 5): cls, cx, cy, w, h."""
+    ids = np.flatnonzero(index["names"] == name)
+    if ids.size == 0:
+        return np.zeros((0, 5), np.float32)
+    sel = index["image_id"] == ids[0]
+    return np.column_stack([index["cls"][sel]] + [index[col][sel] for col in COLUMNS])
+
+
+if __name__ == "__main__":
+    for folder in sys.argv[1:]:
+        print(f"[Saved] {build_label_index(folder)}")
@@ -0,0 +1,124 @@
+"""
+Trăsături de contur comune tuturor clasificatoarelor de forme.
+
+Pentru fiecare obiect se calculează o singură dată un vector de trăsături
+(vezi FEATURES): numărul de vârfuri al aproximării poligonale, convexitatea,
+extent (aria / bbox), soliditatea (aria / înfășurătoarea convexă), raportul de
+aspect, gradul de umplere al cercului circumscris, găurile (număr, circularitate,
+poziție) și momentele Hu în scară logaritmică.
+
+Vectorii se adună într-o matrice (N, len(FEATURES)), iar regulile de clasificare
+se evaluează vectorizat pe toată matricea. Un rând NaN (mască goală) devine "unknown".
+"""
+import cv2
+import numpy as np
+
+FEATURES = (
+    "vertices",          # vârfurile approxPolyDP(0.04 * perimetru)
+    "convex",            # 1 dacă aproximarea poligonală e convexă
+    "area",
+    "extent",            # aria / aria boundingRect
+    "solidity",          # aria / aria înfășurătorii convexe
+    "aspect",            # w / h al boundingRect
+    "rect_aspect",       # latura scurtă / latura lungă a minAreaRect (<= 1)
+    "fill_circle",       # aria / aria cercului circumscris (<= 1)
+    "n_parts",           # contururi exterioare în mască
+    "n_holes",           # găuri în mască
+    "hole_circularity",  # aria celei mai mari găuri / aria cercului ei circumscris
+    "hole_x",            # centrul găurii, relativ la bbox-ul exterior (0..1)
+) + tuple(f"hu{i}" for i in range(1, 8))
+
+COL = {name: i for i, name in enumerate(FEATURES)}
+
+# Clasele dataset-ului sintetic (extract_objects.py, 2detectObjAndRefine.py)
+BLOCK_SHAPES = ("triangle", "rectangle", "arch", "half-circle", "cylinder", "cube")
+# Clasele din pages/app_2_shape_classifier.py
+OUTLINE_SHAPES = ("triangle", "square", "rectangle", "pentagon", "circle", "arch", "unknown")
+
+
+def empty_features():
+    return np.full(len(FEATURES), np.nan)
+
+
+def contour_features(cnt, holes=(), n_parts=1):
+    """Vectorul de trăsături al unui contur exterior (și al găurilor lui, dacă există)."""
+    f = empty_features()
+    area = cv2.contourArea(cnt)
+    approx = cv2.approxPolyDP(cnt, 0.04 * cv2.arcLength(cnt, True), True)
+    x, y, w, h = cv2.boundingRect(cnt)
+    (_, _), (rw, rh), _ = cv2.minAreaRect(cnt)
+    _, r = cv2.minEnclosingCircle(cnt)
+    hull_area = cv2.contourArea(cv2.convexHull(cnt))
+
+    f[COL["vertices"]] = len(approx)
+    f[COL["convex"]] = cv2.isContourConvex(approx)
+    f[COL["area"]] = area
+    f[COL["extent"]] = area / (w * h) if w * h else 0.0
+    f[COL["solidity"]] = area / hull_area if hull_area else 0.0
+    f[COL["aspect"]] = w / h if h else 0.0
+    f[COL["rect_aspect"]] = min(rw, rh) / max(rw, rh) if max(rw, rh) else 0.0
+    f[COL["fill_circle"]] = area / (np.pi * r * r) if r else 0.0
+    f[COL["n_parts"]] = n_parts
+    f[COL["n_holes"]] = len(holes)
+
+    if len(holes):
+        hole = max(holes, key=cv2.contourArea)
+        (hx, _), hr = cv2.minEnclosingCircle(hole)
+        f[COL["hole_circularity"]] = cv2.contourArea(hole) / (np.pi * hr * hr) if hr else 0.0
+        f[COL["hole_x"]] = (hx - x) / w if w else 0.0
+
+    hu = cv2.HuMoments(cv2.moments(cnt)).ravel()
+    log_hu = -np.copysign(1.0, hu) * np.log10(np.abs(hu) + 1e-30)
+    f[COL["hu1"]:COL["hu7"] + 1] = np.where(hu == 0, 0.0, log_hu)
+    return f
+
+
+def mask_features(mask):
+    """Trăsăturile celui mai mare obiect dintr-o mască binară (ex. canalul alpha).
+
+    Găurile se găsesc cu RETR_CCOMP; o mască goală dă un rând NaN.
+    """
+    cnts, hierarchy = cv2.findContours(mask, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+    if not cnts or hierarchy is None:
+        return empty_features()
+    parent = hierarchy[0][:, 3]
+    outer = [cnts[i] for i in np.flatnonzero(parent == -1)]
+    holes = [cnts[i] for i in np.flatnonzero(parent != -1)]
+    return contour_features(max(outer, key=cv2.contourArea), holes, n_parts=len(outer))
+
+
+def feature_matrix(rows):
+    """Stivuiește vectorii de trăsături într-o matrice (N, len(FEATURES))."""
+    if not len(rows):
+        return np.zeros((0, len(FEATURES)))
+    return np.vstack(rows)
+
+
+def _columns(F):
+    F = np.atleast_2d(F)
+    return {name: F[:, i] for name, i in COL.items()}
+
+
+def classify_blocks(F):
+    """Clasele dataset-ului (BLOCK_SHAPES) pentru fiecare rând din F, vectorizat."""
+    c = _columns(F)
+    v = c["vertices"]
+    return np.select(
+        [np.isnan(v), v == 3, (v == 4) & (c["rect_aspect"] >= 0.70), v == 4, v == 5,
+         c["convex"] == 0, c["extent"] < 0.7],
+        ["unknown", "triangle", "cube", "rectangle", "arch", "arch", "half-circle"],
+        default="cylinder")
+
+
+def classify_outlines(F):
+    """Clasele din app_2 (OUTLINE_SHAPES): arcadă = o singură gaură aproape circulară,
+    nu prea aproape de marginea obiectului; altfel după numărul de vârfuri."""
+    c = _columns(F)
+    v = c["vertices"]
+    arch = ((c["n_parts"] == 1) & (c["n_holes"] == 1) & (c["hole_circularity"] > 0.75)
+            & (c["hole_x"] > 0.2) & (c["hole_x"] < 0.8))
+    return np.select(
+        [arch, v == 3, (v == 4) & (c["aspect"] >= 0.95) & (c["aspect"] <= 1.05), v == 4, v == 5,
+         c["fill_circle"] > 0.9],
+        ["arch", "triangle", "square", "rectangle", "pentagon", "circle"],
+        default="unknown")
@@ -0,0 +1,117 @@
+"""
+Miniaturi pe disc pentru galeriile din Streamlit (dataset_visualizer, app_2).
+
+Fiecare miniatură se generează o singură dată în THUMB_CACHE, cu cheia
+(cale absolută, mtime, dimensiune fișier, dimensiunea miniaturii); un fișier
+modificat primește automat o cheie nouă. JPEG-urile se decodează direct la
+rezoluție redusă (draft mode: libjpeg scalează DCT-ul cu 1/2, 1/4, 1/8), deci
+o captură de 12 MP nu se mai decodează întreagă pentru 160 px. PNG-urile
+rămân PNG (păstrează transparența obiectelor RGBA).
+
+Galeria afișează o singură pagină de N elemente; doar miniaturile paginii
+curente sunt citite / generate.
+
+Cache-ul se poate încălzi dinainte:
+    python thumbnails.py dataset/train/images dataset/val/images
+"""
+import os
+import sys
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+THUMB_CACHE = os.path.join(BASE_DIR, ".thumb_cache")
+THUMB_SIZE = (160, 140)
+VALID_EXT = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def thumbnail_key(path, size=THUMB_SIZE):
+    st = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{size[0]}x{size[1]}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def thumbnail_path(path, size=THUMB_SIZE, cache_dir=THUMB_CACHE):
+    """Calea miniaturii din cache (generată acum dacă lipsește)."""
+    key = thumbnail_key(path, size)
+    ext = ".png" if path.lower().endswith(".png") else ".jpg"
+    out = os.path.join(cache_dir, key[:2], key + ext)
+    if not os.path.exists(out):
+        make_thumbnail(path, out, size)
+    return out
+
+
+def make_thumbnail(path, out, size=THUMB_SIZE):
+    with Image.open(path) as im:
+        if im.format == "JPEG":
+            im.draft("RGB", size)  # decodare redusă, cel mult la scara >= size
+        im.thumbnail(size)
+        if out.endswith(".jpg") and im.mode != "RGB":
+            im = im.convert("RGB")
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        tmp = out + ".tmp"
+        im.save(tmp, format="PNG" if out.endswith(".png") else "JPEG", quality=85)
+    os.replace(tmp, out)
+
+
+def thumbnails(paths, size=THUMB_SIZE, cache_dir=THUMB_CACHE, workers=8):
+    """Miniaturile pentru o listă de căi, în ordine (None pentru fișierele ilizibile)."""
+    def one(path):
+        try:
+            return thumbnail_path(path, size, cache_dir)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Thumbnail failed for {path}: {e}")
+            return None
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(one, paths))
+
+
+def page_slice(n_items, page, per_page):
+    """(start, stop, n_pages) pentru pagina `page` (0-based, limitată la intervalul valid)."""
+    n_pages = max(1, -(-n_items // per_page))
+    page = min(max(page, 0), n_pages - 1)
+    return page * per_page, min((page + 1) * per_page, n_items), n_pages
+
+
+def thumbnail_grid(paths, captions=None, key="thumbs", per_page=24, columns=4,
+                   size=THUMB_SIZE, on_select=None):
+    """Grilă Streamlit paginată de miniaturi.
+
+    Cu on_select, sub fiecare miniatură apare un buton care apelează on_select(i),
+    i fiind indexul în `paths`. Returnează intervalul (start, stop) afișat.
+    """
+    import streamlit as st
+
+    if not paths:
+        st.info("Nothing to show.")
+        return 0, 0
+    n_pages = page_slice(len(paths), 0, per_page)[2]
+    page_key = f"{key}_page"
+    # lista se poate micșora între rulări (filtre), pagina salvată trebuie să rămână validă
+    st.session_state[page_key] = min(max(st.session_state.get(page_key, 1), 1), n_pages)
+    page = st.number_input(f"Page (1-{n_pages})", min_value=1, max_value=n_pages,
+                           step=1, key=page_key) - 1
+    start, stop, _ = page_slice(len(paths), page, per_page)
+    st.caption(f"{start + 1}-{stop} of {len(paths)}")
+
+    cols = st.columns(columns)
+    for i, thumb in zip(range(start, stop), thumbnails(paths[start:stop], size)):
+        col = cols[(i - start) % columns]
+        caption = captions[i] if captions is not None else os.path.basename(paths[i])
+        if thumb is None:
+            col.warning(caption)
+        else:
+            col.image(thumb, caption=caption)
+        if on_select is not None:
+            col.button("Open", key=f"{key}_open_{i}", on_click=on_select, args=(i,))
+    return start, stop
+
+
+if __name__ == "__main__":
+    for folder in sys.argv[1:]:
+        files = [os.path.join(folder, f) for f in sorted(os.listdir(folder))
+                 if f.lower().endswith(VALID_EXT)]
+        done = sum(t is not None for t in thumbnails(files))
+        print(f"[Saved] {done}/{len(files)} thumbnails for {folder} -> {THUMB_CACHE}")
@@ -1,6 +1,12 @@
 # lab/cleaner.py
 
 import os
+import sys
+import numpy as np
+
+EXTRACT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "ExtractAndPlace"))
+sys.path.insert(0, EXTRACT_DIR)
+from label_index import load_label_index
 
 DATASET_DIR = "dataset"
 SPLIT = "train"
@@ -8,12 +14,18 @@ SPLIT = "train"
 labels_dir = os.path.join(DATASET_DIR, "labels", SPLIT)
 empty_files = []
 
-for label_file in os.listdir(labels_dir):
-    label_path = os.path.join(labels_dir, label_file)
-    with open(label_path) as f:
-        lines = f.readlines()
-        if len(lines) == 0:
-            empty_files.append(label_file)
+index = load_label_index(labels_dir)
+if index is not None:
+    # imaginile fără nicio etichetă în index
+    per_image = np.bincount(index["image_id"], minlength=len(index["names"]))
+    empty_files = [f"{name}.txt" for name in index["names"][per_image == 0]]
+else:
+    for label_file in os.listdir(labels_dir):
+        label_path = os.path.join(labels_dir, label_file)
+        with open(label_path) as f:
+            lines = f.readlines()
+            if len(lines) == 0:
+                empty_files.append(label_file)
 
 print("\n⚠ Empty label files:")
 for f in empty_files:
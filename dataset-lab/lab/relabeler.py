@@ -1,9 +1,13 @@
 # lab/relabeler.py
 
-import os, json, re
+import os, sys, json, re
 import google.generativeai as genai
 from PIL import Image
 
+EXTRACT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "ExtractAndPlace"))
+sys.path.insert(0, EXTRACT_DIR)
+from label_index import drop_label_index
+
 API_KEY = os.environ['GEMINI_API_KEY']
 genai.configure(api_key=API_KEY)
 model = genai.GenerativeModel(model_name="gemini-2.0-flash")
@@ -48,6 +52,7 @@ def relabel_one(split, filename):
     label_path = os.path.join(DATASET_DIR, "labels", split, filename.replace(".jpeg", ".txt"))
     with open(label_path, "w") as f:
         f.write("\n".join(yolo_lines))
+    drop_label_index(os.path.dirname(label_path))
     print(f"✅ Updated: {label_path}")
 
 # Example:
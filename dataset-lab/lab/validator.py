@@ -1,9 +1,15 @@
 # lab/validator.py
 
 import os
+import sys
+import numpy as np
 import pandas as pd
 from collections import Counter
 
+EXTRACT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "ExtractAndPlace"))
+sys.path.insert(0, EXTRACT_DIR)
+from label_index import load_label_index
+
 DATASET_DIR = "dataset"
 CLASSES = ["triangle", "half circle", "cube", "rectangle", "cylinder", "arch"]
 
@@ -11,11 +17,16 @@ def collect_stats(split):
     labels_dir = os.path.join(DATASET_DIR, "labels", split)
     class_counts = Counter()
 
-    for label_file in os.listdir(labels_dir):
-        with open(os.path.join(labels_dir, label_file)) as f:
-            for line in f:
-                cls_id = int(line.strip().split()[0])
-                class_counts[cls_id] += 1
+    index = load_label_index(labels_dir)
+    if index is not None:
+        counts = np.bincount(index["cls"])
+        class_counts.update({i: int(n) for i, n in enumerate(counts) if n})
+    else:
+        for label_file in os.listdir(labels_dir):
+            with open(os.path.join(labels_dir, label_file)) as f:
+                for line in f:
+                    cls_id = int(line.strip().split()[0])
+                    class_counts[cls_id] += 1
 
     df = pd.DataFrame({
         'class_id': class_counts.keys(),
@@ -8,11 +8,28 @@ class ArucoCropper:
     O clasa pentru a detecta 4 markere ArUco de referinta, a decupa regiunea
     interioara si a o returna ca o imagine corectata din perspectiva.
     """
-    def __init__(self, camera_resolution=(4608, 2592), reference_ids=[0, 1, 2, 3]):
+    # coltul interior al fiecarui marker (TL, TR, BR, BL) = indexul coltului in detectMarkers
+    INNER_CORNER = (2, 3, 0, 1)
+
+    def __init__(self, camera_resolution=(4608, 2592), reference_ids=[0, 1, 2, 3],
+                 tracking=True, coarse_scale=0.25, track_margin=0.5, corner_tol=2.0,
+                 output_size=None):
         """
         Initializeaza camera si detectorul ArUco.
         :param camera_resolution: Rezolutia maxima a senzorului camerei.
         :param reference_ids: Lista cu ID-urile markerelor de colt.
+        :param tracking: Cauta markerele doar in ferestre in jurul ultimei pozitii
+            (apoi pe cadrul micsorat cu coarse_scale, apoi pe tot cadrul).
+        :param coarse_scale: Scara cadrului pentru detectia grosiera (0 = dezactivata).
+        :param track_margin: Marginea ferestrei, ca fractiune din latura markerului.
+        :param corner_tol: Deplasarea maxima (px) a colturilor pentru care
+            homografia anterioara se refoloseste.
+        :param output_size: Dimensiunea imaginii decupate: None = W x H nativ,
+            int = latura maxima (aspectul se pastreaza, ex. 640 pentru YOLO),
+            (w, h) = dimensiune fixa. Cadrul se corecteaza direct la aceasta rezolutie
+            (dupa o prefiltrare INTER_AREA, vezi _homography). Atentie: tot ce se
+            masoara pe imaginea decupata (center_px al detectiilor, crop_shape)
+            e atunci in pixeli output_size, nu in pixelii decupajului nativ.
         """
         # Constante pentru ArUco
         self.REFERENCE_IDS = reference_ids
@@ -33,48 +50,104 @@ class ArucoCropper:
         # Stocam ultima pozitie a colturilor gasite
         self._last_inner_corners_px = None
 
+        # Urmarire: colturile complete ale markerelor din ultimul cadru {id: (4, 2)}
+        self.tracking = tracking
+        self.coarse_scale = coarse_scale
+        self.track_margin = track_margin
+        self.corner_tol = corner_tol
+        self._last_markers = None
+        self.output_size = output_size
+        # Homografia curenta: (src, M, W, H, roi, k) si hartile remap pentru ea (CV_16SC2, calculate o data)
+        self._warp = None
+        self._maps = None
+        self.detect_stats = {"tracked": 0, "coarse": 0, "full": 0, "lost": 0,
+                             "homography_reused": 0}
+
     def capture_frame(self):
         """Captureaza un singur cadru de la camera."""
         return self.picam2.capture_array()
 
-    def get_cropped_image(self, frame):
-        """
-        Detecteaza cele 4 markere ArUco si returneaza o imagine decupata,
-        corectata din perspectiva, a regiunii interioare.
-        Returneaza np.array sau None.
-        """
-        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+    def _detect_markers(self, gray, offset=(0, 0), scale=1.0):
+        """Markerele de referinta din gray, ca {id: colturi (4, 2)} in coordonatele cadrului."""
         corners, ids, _ = self.DETECTOR.detectMarkers(gray)
+        if ids is None:
+            return {}
+        found = {}
+        for marker_corners, marker_id in zip(corners, ids.flatten()):
+            if marker_id in self.REFERENCE_IDS:
+                found[int(marker_id)] = marker_corners[0] * scale + np.float32(offset)
+        return found
 
-        if ids is None or len(ids) < 4:
-            self._last_inner_corners_px = None
-            return None
+    def _detect_in_windows(self, frame, markers):
+        """Cauta fiecare marker doar intr-o fereastra in jurul pozitiei date; None daca lipseste vreunul."""
+        fh, fw = frame.shape[:2]
+        found = {}
+        for marker_id in self.REFERENCE_IDS:
+            pts = markers.get(marker_id)
+            if pts is None:
+                return None
+            x0, y0 = pts.min(axis=0)
+            x1, y1 = pts.max(axis=0)
+            pad = self.track_margin * max(x1 - x0, y1 - y0) + 16
+            x0, y0 = max(int(x0 - pad), 0), max(int(y0 - pad), 0)
+            x1, y1 = min(int(x1 + pad) + 1, fw), min(int(y1 + pad) + 1, fh)
+            if x1 <= x0 or y1 <= y0:
+                return None
+            # doar fereastra se converteste in gray, nu tot cadrul de 12 MP
+            gray = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_RGB2GRAY)
+            hit = self._detect_markers(gray, offset=(x0, y0)).get(marker_id)
+            if hit is None:
+                return None
+            found[marker_id] = hit
+        return found
 
-        ids = ids.flatten()
-        inner_corners = {}
-        for i, marker_id in enumerate(ids):
-            if marker_id not in self.REFERENCE_IDS:
-                continue
-            marker_corners = corners[i][0]
-            if marker_id == self.REFERENCE_IDS[0]:  # TL
-                inner_corners[0] = marker_corners[2]
-            elif marker_id == self.REFERENCE_IDS[1]:  # TR
-                inner_corners[1] = marker_corners[3]
-            elif marker_id == self.REFERENCE_IDS[2]:  # BR
-                inner_corners[2] = marker_corners[0]
-            elif marker_id == self.REFERENCE_IDS[3]:  # BL
-                inner_corners[3] = marker_corners[1]
-
-        if len(inner_corners) != 4:
-            self._last_inner_corners_px = None
+    def _locate_markers(self, frame):
+        """Colturile celor 4 markere de referinta {id: (4, 2)} sau None."""
+        if self.tracking:
+            if self._last_markers is not None:
+                markers = self._detect_in_windows(frame, self._last_markers)
+                if markers is not None:
+                    self.detect_stats["tracked"] += 1
+                    return markers
+            if self.coarse_scale:
+                # detectie grosiera pe cadrul micsorat, rafinata apoi in ferestre la rezolutie completa
+                small = cv2.resize(frame, None, fx=self.coarse_scale, fy=self.coarse_scale,
+                                   interpolation=cv2.INTER_AREA)
+                coarse = self._detect_markers(cv2.cvtColor(small, cv2.COLOR_RGB2GRAY),
+                                              scale=1.0 / self.coarse_scale)
+                if len(coarse) == len(self.REFERENCE_IDS):
+                    markers = self._detect_in_windows(frame, coarse)
+                    if markers is not None:
+                        self.detect_stats["coarse"] += 1
+                        return markers
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        markers = self._detect_markers(gray)
+        if len(markers) != len(self.REFERENCE_IDS):
+            self.detect_stats["lost"] += 1
             return None
+        self.detect_stats["full"] += 1
+        return markers
 
-        # Puncte sursa ordonate: TL, TR, BR, BL
-        src = np.array([
-            inner_corners[0], inner_corners[1],
-            inner_corners[2], inner_corners[3]
-        ], dtype="float32")
-        self._last_inner_corners_px = inner_corners.copy()
+    def _output_size(self, W, H):
+        if self.output_size is None:
+            return W, H
+        if isinstance(self.output_size, int):
+            scale = self.output_size / max(W, H)
+            return max(int(round(W * scale)), 1), max(int(round(H * scale)), 1)
+        return tuple(self.output_size)
+
+    def _homography(self, src, frame_shape):
+        """((src, M, W, H, roi, k), reused); refoloseste homografia anterioara daca niciun colt nu s-a miscat peste corner_tol.
+
+        M corecteaza imaginea sursa prefiltrata: cadrul decupat la roi (dreptunghiul
+        care contine colturile) si micsorat INTER_AREA de k ori (k = 2^n), astfel
+        incat warp-ul sa mai micsoreze cel mult de 2 ori. Fara asta, un warp direct
+        de la ~3600 px la 640 esantioneaza ~1 pixel din 6 si obiectele mici se pierd (aliasing).
+        """
+        if self._warp is not None and np.abs(src - self._warp[0]).max() <= self.corner_tol:
+            self.detect_stats["homography_reused"] += 1
+            return self._warp, True
 
         # Dimensiuni dinamice
         w_top = np.linalg.norm(src[0] - src[1])
@@ -83,13 +156,69 @@ class ArucoCropper:
         h_right = np.linalg.norm(src[1] - src[2])
         W, H = int(max(w_top, w_bot)), int(max(h_left, h_right))
         if W == 0 or H == 0:
+            return None, False
+        W_out, H_out = self._output_size(W, H)
+        scale = min(W_out / W, H_out / H)
+        k = 2 ** int(np.floor(np.log2(1 / scale))) if scale < 1 else 1
+
+        # roi aliniat la multipli de k, ca micsorarea sa fie exact de k ori
+        fh, fw = frame_shape[:2]
+        x0 = max(int(np.floor(src[:, 0].min())) - 1, 0) // k * k
+        y0 = max(int(np.floor(src[:, 1].min())) - 1, 0) // k * k
+        x1 = x0 + (min(int(np.ceil(src[:, 0].max())) + 2, fw) - x0) // k * k
+        y1 = y0 + (min(int(np.ceil(src[:, 1].max())) + 2, fh) - y0) // k * k
+        # centrul pixelului p din cadru -> centrul corespunzator in imaginea prefiltrata
+        src_small = (src - np.float32([x0, y0]) + 0.5) / k - 0.5
+
+        dst = np.array([[0,0], [W_out-1,0], [W_out-1,H_out-1], [0,H_out-1]], dtype="float32")
+        M = cv2.getPerspectiveTransform(src_small.astype(np.float32), dst)
+        self._warp = (src, M, W_out, H_out, (x0, y0, x1, y1), k)
+        self._maps = None
+        return self._warp, False
+
+    @staticmethod
+    def _remap_maps(M, W, H):
+        """Hartile cv2.remap pentru warpPerspective(M, (W, H)), in virgula fixa (CV_16SC2 + tabel de interpolare)."""
+        xs, ys = np.meshgrid(np.arange(W, dtype=np.float32), np.arange(H, dtype=np.float32))
+        grid = np.dstack([xs, ys]).reshape(-1, 1, 2)
+        src = cv2.perspectiveTransform(grid, np.linalg.inv(M)).reshape(H, W, 2)
+        return cv2.convertMaps(src, None, cv2.CV_16SC2)
+
+    def get_cropped_image(self, frame):
+        """
+        Detecteaza cele 4 markere ArUco si returneaza o imagine decupata,
+        corectata din perspectiva, a regiunii interioare.
+        Returneaza np.array sau None.
+        """
+        markers = self._locate_markers(frame)
+        self._last_markers = markers
+        if markers is None:
+            self._last_inner_corners_px = None
+            return None
+
+        # Puncte sursa ordonate: TL, TR, BR, BL
+        src = np.array([
+            markers[marker_id][corner]
+            for marker_id, corner in zip(self.REFERENCE_IDS, self.INNER_CORNER)
+        ], dtype="float32")
+
+        warp, reused = self._homography(src, frame.shape)
+        if warp is None:
             self._last_inner_corners_px = None
             return None
+        # colturile raportate sunt cele ale homografiei folosite (stabile cat timp se refoloseste)
+        src, M, W, H, (x0, y0, x1, y1), k = warp
+        self._last_inner_corners_px = {i: src[i] for i in range(4)}
 
-        dst = np.array([[0,0], [W-1,0], [W-1,H-1], [0,H-1]], dtype="float32")
-        M = cv2.getPerspectiveTransform(src, dst)
-        warped = cv2.warpPerspective(frame, M, (W, H))
-        return warped
+        image = frame[y0:y1, x0:x1]
+        if k > 1:
+            image = cv2.resize(image, ((x1 - x0) // k, (y1 - y0) // k), interpolation=cv2.INTER_AREA)
+        if not reused:
+            # homografie noua: poate fi doar jitter, hartile se construiesc abia cand se refoloseste
+            return cv2.warpPerspective(image, M, (W, H))
+        if self._maps is None:
+            self._maps = self._remap_maps(M, W, H)
+        return cv2.remap(image, *self._maps, cv2.INTER_LINEAR)
 
     def get_aruco_inner_corners_px(self):
         """
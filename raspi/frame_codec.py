@@ -0,0 +1,39 @@
+"""Binary frame format for POST /frame (detections + raw JPEG, no base64).
+
+Length-prefixed body (Content-Type: application/x-detection-frame):
+    4 bytes   big-endian length N of the JSON header
+    N bytes   UTF-8 JSON header: detections, crop_shape, timestamp, ...
+    rest      JPEG bytes, stored and served back verbatim
+
+The endpoint also accepts multipart/form-data with a `meta` field (the same
+JSON header) and an `image` file part.
+
+Stdlib only: used by the Pi sender (frame_sender.py) and by the Flask server /
+DetectionSender in ExtractAndPlace/Streamlit/ble_detection_app.
+"""
+
+import json
+import struct
+
+FRAME_CONTENT_TYPE = "application/x-detection-frame"
+_HEADER_LEN = struct.Struct(">I")
+
+
+def pack_frame(meta, jpeg_bytes):
+    """Encode a JSON-serializable header and JPEG bytes into one body."""
+    header = json.dumps(meta, separators=(",", ":")).encode()
+    return _HEADER_LEN.pack(len(header)) + header + bytes(jpeg_bytes)
+
+
+def unpack_frame(body):
+    """Decode a length-prefixed body into (meta dict, jpeg bytes)."""
+    if len(body) < _HEADER_LEN.size:
+        raise ValueError("Frame too short")
+    (n,) = _HEADER_LEN.unpack_from(body)
+    end = _HEADER_LEN.size + n
+    if end > len(body):
+        raise ValueError(f"Header length {n} exceeds body size {len(body)}")
+    meta = json.loads(body[_HEADER_LEN.size:end])
+    if not isinstance(meta, dict):
+        raise ValueError("Frame header must be a JSON object")
+    return meta, body[end:]
@@ -0,0 +1,112 @@
+# frame_sender.py
+# Trimite frame-urile catre serverul Flask (/frame) fara sa blocheze bucla captura -> YOLO.
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+import requests
+from requests.adapters import HTTPAdapter
+
+from frame_codec import FRAME_CONTENT_TYPE, pack_frame
+from pipeline import STOP, LatestQueue
+
+
+class FrameSender:
+    """Background sender with a keep-alive session and a latest-wins queue.
+
+    submit() never waits for the network: if the server is slower than the
+    detection loop, the oldest pending frame is dropped (and counted) so the
+    one that gets sent is always the most recent. JPEG encoding also happens
+    on the sender thread, so dropped frames are never encoded.
+    """
+
+    def __init__(self, url, timeout=3, max_pending=1, jpeg_quality=90):
+        self.url = url
+        self.timeout = timeout
+        self.jpeg_quality = jpeg_quality
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)  # o singură conexiune keep-alive
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Content-Type"] = FRAME_CONTENT_TYPE
+        self._queue = LatestQueue(max_pending)
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=100)
+        self.sent = self.failed = 0
+        self.last_status = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="FrameSender", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        if self._thread is not None:
+            self._stop_event.set()
+            self._queue.close()
+            self._thread.join(timeout)
+            self._thread = None
+        self.session.close()
+
+    def submit(self, image, detections):
+        """Queue a frame for sending; returns False if an older frame was dropped."""
+        h, w = image.shape[:2]
+        meta = {
+            "timestamp": time.strftime("%Y%m%d_%H%M%S"),
+            "detections": detections,
+            "crop_shape": [w, h]  # OBLIGATORIU: [width, height]
+        }
+        return self._queue.put((meta, image))
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is STOP:
+                break
+            meta, image = item
+            ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                with self._lock:
+                    self.failed += 1
+                continue
+            start = time.perf_counter()
+            try:
+                response = self.session.post(self.url, data=pack_frame(meta, buffer.tobytes()),
+                                             timeout=self.timeout)
+                response.raise_for_status()
+                status = response.json().get("status", "unknown")
+            except Exception as e:
+                print("❌ Failed to send:", e)
+                with self._lock:
+                    self.failed += 1
+                continue
+            ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.sent += 1
+                self.last_status = status
+                self._latencies.append(ms)
+            w, h = meta["crop_shape"]
+            print(f"📤 Sent frame {w}x{h} with {len(meta['detections'])} detections "
+                  f"in {ms:.0f} ms - BLE Status: {status}")
+
+    def stats(self):
+        """Counters plus send latency (ms) over the last 100 frames."""
+        with self._lock:
+            lat = sorted(self._latencies)
+            return {
+                "sent": self.sent,
+                "failed": self.failed,
+                "dropped": self._queue.dropped,
+                "pending": self._queue.qsize(),
+                "last_status": self.last_status,
+                "latency_ms_p50": round(lat[len(lat) // 2], 1) if lat else None,
+                "latency_ms_max": round(lat[-1], 1) if lat else None,
+            }
@@ -0,0 +1,194 @@
+# pipeline.py
+# Etape captura -> crop -> YOLO -> trimitere, fiecare pe firul ei, legate prin cozi "latest-wins".
+import queue
+import threading
+import time
+
+STOP = object()
+
+
+class LatestQueue:
+    """Bounded queue where put() never blocks: when full, the oldest item is dropped.
+
+    close() enqueues STOP like any other item, so on a full queue it evicts the
+    oldest pending item (counted in dropped; with maxsize=1 the consumer gets
+    STOP next, not the last item). Later puts are refused, so STOP itself can
+    never be evicted.
+    """
+
+    def __init__(self, maxsize=1):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """Enqueue item; returns False if an older item had to be dropped or the queue is closed."""
+        with self._lock:
+            if self.closed:
+                return False
+            return self._put(item)
+
+    def _put(self, item):
+        dropped = False
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return not dropped
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    continue
+                dropped = True
+                self.dropped += 1
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            if not self.closed:
+                self.closed = True
+                self._put(STOP)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+class Stage(threading.Thread):
+    """One pipeline step: out = fn(item) (or fn() for the source stage).
+
+    A None result means "nothing to pass on" (ex. markers not found) and is
+    counted as skipped; the last stage is a sink and its result is ignored.
+    Exceptions are logged and counted; after each consecutive failure the stage
+    waits longer (up to MAX_BACKOFF s) and after max_errors in a row it stops.
+    """
+    MIN_BACKOFF, MAX_BACKOFF = 0.05, 2.0
+
+    def __init__(self, name, fn, inbox=None, outbox=None, max_errors=20):
+        super().__init__(name=name, daemon=True)
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.max_errors = max_errors
+        self.count = self.skipped = self.errors = 0
+        self.busy_ms = self.last_ms = self.max_ms = 0.0
+        self._started_at = None
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _next(self):
+        while not self._stop_event.is_set():
+            try:
+                return self.inbox.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return STOP
+
+    def run(self):
+        self._started_at = time.perf_counter()
+        consecutive = 0
+        try:
+            while not self._stop_event.is_set():
+                if self.inbox is None:
+                    args = ()
+                else:
+                    item = self._next()
+                    if item is STOP:
+                        break
+                    args = (item,)
+
+                start = time.perf_counter()
+                try:
+                    out = self.fn(*args)
+                except Exception as e:
+                    print(f"[WARN] {self.name} failed: {e}")
+                    out, failed = None, True
+                else:
+                    failed = False
+                ms = (time.perf_counter() - start) * 1000
+
+                with self._lock:
+                    self.count += 1
+                    self.busy_ms += ms
+                    self.last_ms = ms
+                    self.max_ms = max(self.max_ms, ms)
+                    if failed:
+                        self.errors += 1
+                    elif out is None and self.outbox is not None:
+                        self.skipped += 1
+                if failed:
+                    consecutive += 1
+                    if consecutive >= self.max_errors:
+                        print(f"[WARN] {self.name} stopped after {consecutive} consecutive errors")
+                        break
+                    # ex. camera deconectata: sursa nu mai invarte bucla la viteza maxima
+                    self._stop_event.wait(min(self.MIN_BACKOFF * 2 ** (consecutive - 1), self.MAX_BACKOFF))
+                    continue
+                consecutive = 0
+                if out is not None and self.outbox is not None:
+                    self.outbox.put(out)
+        finally:
+            if self.outbox is not None:
+                self.outbox.close()
+
+    def stats(self):
+        with self._lock:
+            elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+            return {
+                "count": self.count,
+                "skipped": self.skipped,
+                "errors": self.errors,
+                "avg_ms": round(self.busy_ms / self.count, 1) if self.count else None,
+                "last_ms": round(self.last_ms, 1),
+                "max_ms": round(self.max_ms, 1),
+                "fps": round(self.count / elapsed, 2) if elapsed else 0.0,
+                # cat din timp a lucrat etapa (restul = asteptare dupa intrare)
+                "busy": round(self.busy_ms / 1000 / elapsed, 2) if elapsed else 0.0,
+                "dropped_in": self.inbox.dropped if self.inbox is not None else 0,
+            }
+
+
+class Pipeline:
+    """Chain of stages [(name, fn), ...]; the first fn is the source and takes no input.
+
+    Between consecutive stages sits a LatestQueue(maxsize), so while stage k
+    works on frame N, stage k-1 already produces frame N+1, and a slow stage
+    always picks up the most recent frame instead of a backlog.
+    """
+
+    def __init__(self, steps, maxsize=1):
+        self.queues = [LatestQueue(maxsize) for _ in steps[1:]]
+        inboxes = [None] + self.queues
+        outboxes = self.queues + [None]
+        self.stages = [Stage(name, fn, inbox, outbox)
+                       for (name, fn), inbox, outbox in zip(steps, inboxes, outboxes)]
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    def stop(self, timeout=5):
+        # etapele asteapta intrarea cu timeout, deci se opresc si cand coada din fata e goala
+        for stage in self.stages:
+            stage.stop()
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def is_alive(self):
+        """True while every stage runs (one stopped stage starves or stalls the rest)."""
+        return all(stage.is_alive() for stage in self.stages)
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def format_stats(self):
+        return " | ".join(
+            f"{name}: {s['fps']:.1f} fps, {s['avg_ms'] or 0:.0f} ms avg, busy {s['busy']:.0%}, "
+            f"dropped {s['dropped_in']}, skipped {s['skipped']}"
+            for name, s in self.stats().items())